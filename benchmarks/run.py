@@ -0,0 +1,201 @@
+"""End-to-end scraper benchmark against a local Vinted stand-in.
+
+python -m benchmarks.run --catalogs 20 --max_pages 0 --latency 0.02
+"""
+
+import os, json, time, random, asyncio, argparse, resource
+
+import src
+from benchmarks.server import FakeVintedServer
+
+# 1.25x steps from 0.1ms to ~70s, fine enough for local latencies.
+LATENCY_BUCKETS = tuple(0.0001 * 1.25**i for i in range(61))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--catalogs", default=10, type=int)
+    parser.add_argument(
+        "--filter_by", choices=["material", "patterns", "color"], default="color"
+    )
+    parser.add_argument(
+        "--max_pages", default=1, type=int, help="0 pages until exhausted."
+    )
+    parser.add_argument("--items_per_query", default=960, type=int)
+    parser.add_argument("--num_options", default=5, type=int)
+    parser.add_argument("--overlap", default=0.2, type=float)
+    parser.add_argument(
+        "--item_padding", default=0, type=int, help="Extra bytes per item."
+    )
+    parser.add_argument(
+        "--latency", default=0.0, type=float, help="Seconds per request."
+    )
+    parser.add_argument("--jitter", default=0.0, type=float)
+    parser.add_argument("--fail_rate", default=0.0, type=float, help="Share of 403s.")
+    parser.add_argument(
+        "--rate", default=0, type=float, help="Rate limiter, 0 disables."
+    )
+    parser.add_argument("--concurrency", "-c", default=0, type=int)
+    parser.add_argument("--upload_workers", "-u", default=0, type=int)
+    parser.add_argument("--stream_rows", default=0, type=int)
+    parser.add_argument("--parse_workers", "-w", default=0, type=int)
+    parser.add_argument(
+        "--json_backend", choices=src.vinted.decode.JSON_BACKENDS, default="auto"
+    )
+    parser.add_argument(
+        "--typed_decode", default=False, type=lambda x: x.lower() == "true"
+    )
+    parser.add_argument("--seed", default=0, type=int)
+    parser.add_argument("--output", default=None, help="JSON file for the report.")
+
+    return vars(parser.parse_args())
+
+
+def run(
+    server_url: str,
+    catalogs: int,
+    filter_by: str,
+    max_pages: int,
+    rate: float,
+    concurrency: int,
+    upload_workers: int,
+    stream_rows: int,
+    parse_workers: int,
+    json_backend: str,
+    typed_decode: bool,
+    seed: int,
+) -> dict:
+    random.seed(seed)
+
+    metrics = src.metrics.Metrics(buckets=LATENCY_BUCKETS)
+    rate_limiter = src.vinted.RateLimiter(rate=rate) if rate > 0 else None
+    decoder = src.vinted.Decoder(json_backend, typed_decode, parse_workers > 0)
+    vinted_client = src.vinted.Vinted(
+        rate_limiter=rate_limiter,
+        decoder=decoder,
+        metrics=metrics,
+        base_url=server_url,
+    )
+
+    sink = src.sinks.MemorySink()
+    scraper = src.scraper.VintedScraper(
+        sink=sink,
+        vinted_client=vinted_client,
+        insert_every_catalog=10,
+        max_pages=max_pages or None,
+        upload_workers=upload_workers,
+        stream_rows=stream_rows or None,
+        metrics=metrics,
+        parse_pool=(
+            src.parse_pool.ParsePool(parse_workers, json_backend, typed_decode)
+            if parse_workers > 0
+            else None
+        ),
+    )
+    catalog_entries = [
+        {"id": catalog_id, "title": f"Catalog {catalog_id}"}
+        for catalog_id in range(1, catalogs + 1)
+    ]
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    cpu_before = _cpu_seconds()
+    started = time.perf_counter()
+
+    if concurrency > 0:
+        asyncio.run(
+            _run_async(
+                scraper, catalog_entries, filter_by, concurrency, server_url, decoder
+            )
+        )
+    else:
+        scraper.run(catalog_entries, filter_by, only_vintage=False, women=True)
+
+    seconds = time.perf_counter() - started
+    scraper.close()
+    cpu_seconds = _cpu_seconds() - cpu_before
+
+    requests = metrics.histogram("request_seconds", endpoint="CATALOG_ITEMS")
+    num_items = scraper.num_uploaded
+
+    return {
+        "items": num_items,
+        "items_processed": scraper.n,
+        "rows_promoted": scraper.num_inserted,
+        "requests": requests.count,
+        "seconds": round(seconds, 3),
+        "items_per_sec": round(num_items / seconds, 1) if seconds else 0.0,
+        "request_p50_ms": round(requests.quantile(0.5) * 1e3, 3),
+        "request_p99_ms": round(requests.quantile(0.99) * 1e3, 3),
+        "cpu_us_per_item": (
+            round(cpu_seconds / num_items * 1e6, 1) if num_items else 0.0
+        ),
+        "peak_rss_mb": round(
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1
+        ),
+        "rss_growth_mb": round(
+            (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before) / 1024, 1
+        ),
+        "metrics": metrics.summary(),
+    }
+
+
+def _cpu_seconds() -> float:
+    # Parse workers are child processes, their CPU only shows in the children
+    # fields once the pool has been shut down.
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+
+async def _run_async(
+    scraper, catalog_entries, filter_by, concurrency, server_url, decoder
+):
+    async with src.vinted.AsyncVinted(
+        max_concurrency=concurrency,
+        max_per_host=concurrency,
+        rate_limiter=scraper.vinted_client.rate_limiter,
+        decoder=decoder,
+        metrics=scraper.metrics,
+        base_url=server_url,
+    ) as async_client:
+        await scraper.run_async(
+            vinted_client=async_client,
+            catalogs=catalog_entries,
+            filter_by=filter_by,
+            only_vintage=False,
+            women=True,
+        )
+
+
+def main(
+    items_per_query: int,
+    num_options: int,
+    overlap: float,
+    item_padding: int,
+    latency: float,
+    jitter: float,
+    fail_rate: float,
+    output: str = None,
+    **kwargs,
+):
+    with FakeVintedServer(
+        latency=latency,
+        jitter=jitter,
+        items_per_query=items_per_query,
+        item_padding=item_padding,
+        fail_rate=fail_rate,
+        num_options=num_options,
+        overlap=overlap,
+        seed=kwargs["seed"],
+    ) as server:
+        report = run(server.url, **kwargs)
+
+    summary = {key: value for key, value in report.items() if key != "metrics"}
+    print(json.dumps(summary, indent=2))
+
+    if output:
+        with open(output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == "__main__":
+    main(**parse_args())
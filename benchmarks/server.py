@@ -0,0 +1,215 @@
+from typing import Dict, List, Optional, Tuple
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import json, time, random, zlib, multiprocessing
+
+API_PREFIX = "/api/v2"
+FILTER_CODES = ["brand", "color", "material", "patterns"]
+
+
+class FakeVinted:
+    """Serves /catalog/items and /catalog/filters like the Vinted API does."""
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        items_per_query: int = 960,
+        item_padding: int = 0,
+        fail_rate: float = 0.0,
+        num_options: int = 5,
+        overlap: float = 0.2,
+        seed: int = 0,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.items_per_query = items_per_query
+        self.item_padding = item_padding
+        self.fail_rate = fail_rate
+        self.num_options = num_options
+        self.overlap = overlap
+
+        self._random = random.Random(seed)
+        self.render_page = lru_cache(maxsize=256)(self._render_page)
+
+    def handle(self, path: str, query: Dict[str, List[str]]) -> Tuple[int, bytes]:
+        if self.latency or self.jitter:
+            time.sleep(self.latency + self._random.uniform(0, self.jitter))
+
+        if not path.startswith(API_PREFIX):
+            return 200, b""
+
+        if self._random.random() < self.fail_rate:
+            return 403, b""
+
+        endpoint = path[len(API_PREFIX) :]
+
+        if endpoint == "/catalog/filters":
+            return 200, self._render_filters()
+
+        if endpoint == "/catalog/items":
+            filter_key = tuple(
+                sorted(
+                    (key, tuple(values))
+                    for key, values in query.items()
+                    if key.endswith("_ids") and key != "catalog_ids"
+                )
+            )
+
+            return 200, self.render_page(
+                int(query.get("catalog_ids", ["0"])[0]),
+                filter_key,
+                int(query.get("page", ["1"])[0]),
+                int(query.get("per_page", ["96"])[0]),
+            )
+
+        return 404, b""
+
+    def _render_filters(self) -> bytes:
+        return json.dumps(
+            {
+                "filters": [
+                    {
+                        "code": code,
+                        "options": [
+                            {"id": 1000 * index + option, "title": f"{code} {option}"}
+                            for option in range(1, self.num_options + 1)
+                        ],
+                    }
+                    for index, code in enumerate(FILTER_CODES, start=1)
+                ]
+            }
+        ).encode()
+
+    def _render_page(
+        self, catalog_id: int, filter_key: Tuple, page: int, per_page: int
+    ) -> bytes:
+        # Queries of a catalog draw overlapping id ranges, so dedup has work to do.
+        stride = max(1, int(self.items_per_query * (1 - self.overlap)))
+        offset = zlib.crc32(repr(filter_key).encode()) % 8 * stride
+        start = (page - 1) * per_page
+        stop = min(start + per_page, self.items_per_query)
+
+        items = [
+            self._render_item(catalog_id * 10**7 + offset + index)
+            for index in range(start, stop)
+        ]
+        total_pages = -(-self.items_per_query // per_page)
+
+        return json.dumps(
+            {
+                "items": items,
+                "pagination": {
+                    "current_page": page,
+                    "total_pages": total_pages,
+                    "total_entries": self.items_per_query,
+                    "per_page": per_page,
+                },
+            }
+        ).encode()
+
+    def _render_item(self, item_id: int) -> Dict:
+        photo_url = f"https://images.vinted.net/t/{item_id}/f800/{item_id}.jpeg"
+
+        item = {
+            "id": item_id,
+            "title": f"Item {item_id}",
+            "price": {"amount": f"{5 + item_id % 97}.0", "currency_code": "EUR"},
+            "is_visible": True,
+            "discount": None,
+            "brand_title": f"Brand {item_id % 31}",
+            "path": f"/items/{item_id}",
+            "user": {
+                "id": item_id % 100003,
+                "login": f"user{item_id % 100003}",
+                "profile_url": f"https://www.vinted.fr/member/{item_id % 100003}",
+                "photo": None,
+            },
+            "url": f"https://www.vinted.fr/items/{item_id}",
+            "promoted": False,
+            "photo": {
+                "id": item_id,
+                "url": photo_url,
+                "dominant_color": "#C4BBB3",
+                "is_main": True,
+                "high_resolution": {"id": str(item_id), "timestamp": 1700000000},
+                "thumbnails": [
+                    {"type": f"thumb{size}", "url": photo_url, "width": size}
+                    for size in (70, 150, 310, 428, 624)
+                ],
+            },
+            "favourite_count": item_id % 23,
+            "is_favourite": False,
+            "view_count": 0,
+            "size_title": f"{34 + item_id % 10} / {2 + item_id % 10},5",
+            "status": "Très bon état",
+            "search_tracking_params": {"score": 0.5, "matched_queries": None},
+        }
+
+        if self.item_padding:
+            item["description"] = "x" * self.item_padding
+
+        return item
+
+
+def make_handler(api: FakeVinted):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args) -> None:
+            pass
+
+        def do_GET(self) -> None:
+            url = urlparse(self.path)
+            status, body = api.handle(url.path, parse_qs(url.query))
+
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+
+            if url.path == "/":
+                self.send_header("Set-Cookie", "session=benchmark; Path=/")
+
+            self.end_headers()
+            self.wfile.write(body)
+
+    return Handler
+
+
+def _serve(port_queue: multiprocessing.Queue, kwargs: Dict) -> None:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(FakeVinted(**kwargs)))
+    server.daemon_threads = True
+    port_queue.put(server.server_port)
+    server.serve_forever()
+
+
+class FakeVintedServer:
+    """Runs FakeVinted in a child process so it doesn't share the client's CPU."""
+
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.url: Optional[str] = None
+        self._process: Optional[multiprocessing.Process] = None
+
+    def __enter__(self) -> "FakeVintedServer":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        port_queue = multiprocessing.Queue()
+        self._process = multiprocessing.Process(
+            target=_serve, args=(port_queue, self.kwargs), daemon=True
+        )
+        self._process.start()
+        self.url = f"http://127.0.0.1:{port_queue.get(timeout=10)}"
+
+    def stop(self) -> None:
+        if self._process is not None:
+            self._process.terminate()
+            self._process.join()
+            self._process = None
@@ -2,15 +2,21 @@ import sys
 
 sys.path.append("../")
 
-from typing import List, Tuple, Dict
-import json, os, argparse
+from typing import Tuple, Dict, Iterable
+import json, os, argparse, asyncio
 import src
 
 
 DOMAIN = "fr"
 INSERT_EVERY_CATALOG = 10
 FILTER_BY_CHOICES = ["material", "patterns", "color"]
+SINK_CHOICES = ["bigquery", "jsonl", "parquet", "sqlite"]
+PROMOTION_CHOICES = ["insert", "merge"]
+DEDUP_INDEXES = {"set": src.dedup.SetIndex, "inthash": src.dedup.IntHashSet}
 REFERENCE_FIELD = "vinted_id"
+MAX_CATALOGS_IN_FLIGHT = 4
+MAX_REQUESTS_PER_HOST = 8
+FILTER_CACHE_TTL = 7 * 24 * 3600
 
 
 def parse_args():
@@ -30,6 +36,201 @@ def parse_args():
         choices=FILTER_BY_CHOICES + ["None"],
         default="None",
     )
+    parser.add_argument(
+        "--concurrency",
+        "-c",
+        default=0,
+        type=int,
+        help="Max concurrent requests, 0 runs the synchronous scraper.",
+    )
+    parser.add_argument(
+        "--rate",
+        "-r",
+        default=0,
+        type=float,
+        help="Initial requests/sec per endpoint, adapted on 403/429. 0 disables.",
+    )
+    parser.add_argument(
+        "--json_backend",
+        choices=src.vinted.decode.JSON_BACKENDS,
+        default="auto",
+        help="JSON decoder, auto picks orjson or msgspec when installed.",
+    )
+    parser.add_argument(
+        "--typed_decode",
+        default=False,
+        type=lambda x: x.lower() == "true",
+        help="Decode search pages into msgspec structs of the parsed fields only.",
+    )
+    parser.add_argument(
+        "--max_pages",
+        "-p",
+        default=1,
+        type=int,
+        help="Max result pages per filter combination, 0 pages until exhausted.",
+    )
+    parser.add_argument(
+        "--stream_rows",
+        default=0,
+        type=int,
+        help="Upload parsed rows every N items instead of once per catalog, 0 disables.",
+    )
+    parser.add_argument(
+        "--upload_workers",
+        "-u",
+        default=0,
+        type=int,
+        help="Background upload threads, 0 uploads synchronously per catalog.",
+    )
+    parser.add_argument(
+        "--parse_workers",
+        default=0,
+        type=int,
+        help="Processes decoding and parsing search pages, 0 parses in-process. "
+        "Requires msgspec.",
+    )
+    parser.add_argument(
+        "--sink",
+        choices=SINK_CHOICES,
+        default="bigquery",
+        help="Where scraped rows are written.",
+    )
+    parser.add_argument(
+        "--fake_bigquery",
+        default=False,
+        type=lambda x: x.lower() == "true",
+        help="Use an in-memory BigQuery client, e.g. to replay into the BigQuery sink offline.",
+    )
+    parser.add_argument(
+        "--sink_path",
+        default="data",
+        help="Directory (jsonl, parquet) or database file (sqlite) of local sinks.",
+    )
+    parser.add_argument(
+        "--upload_mode",
+        choices=src.enums.UPLOAD_MODES,
+        default="stream",
+        help="Streaming inserts, or one load job per flushed batch.",
+    )
+    parser.add_argument(
+        "--promotion",
+        choices=PROMOTION_CHOICES,
+        default="insert",
+        help="Staging promotion: INSERT ... NOT IN, or watermarked MERGE.",
+    )
+    parser.add_argument(
+        "--shard_index",
+        default=0,
+        type=int,
+        help="Index of this worker's catalog shard.",
+    )
+    parser.add_argument(
+        "--shard_count",
+        default=1,
+        type=int,
+        help="Number of workers the catalogs are split across.",
+    )
+    parser.add_argument(
+        "--merge_shards",
+        default=False,
+        type=lambda x: x.lower() == "true",
+        help="Promote every shard's staging tables instead of scraping.",
+    )
+    parser.add_argument(
+        "--seed",
+        default=None,
+        type=int,
+        help="Seed of the client-side catalog shuffle.",
+    )
+    parser.add_argument(
+        "--filter_cache",
+        default=None,
+        help="SQLite file caching catalog filters, disabled if unset.",
+    )
+    parser.add_argument(
+        "--watermarks",
+        default=None,
+        help="SQLite file of the newest id crawled per search, only newer "
+        "items are paged when set.",
+    )
+    parser.add_argument(
+        "--planner",
+        default=None,
+        help="SQLite file of past new items per search, picks the searches of "
+        "each catalog by yield when set.",
+    )
+    parser.add_argument(
+        "--request_budget",
+        default=10,
+        type=int,
+        help="Search requests the planner spends per catalog.",
+    )
+    parser.add_argument(
+        "--price_splits",
+        default=None,
+        help="SQLite file of learned price cuts, searches hitting the result cap "
+        "are split into price ranges when set.",
+    )
+    parser.add_argument(
+        "--dedup_index",
+        choices=list(DEDUP_INDEXES),
+        default="set",
+        help="In-run seen ids, inthash packs them into a flat int64 table.",
+    )
+    parser.add_argument(
+        "--seen_store",
+        "-s",
+        default=None,
+        help="Directory of the persistent seen-id store, disabled if unset.",
+    )
+    parser.add_argument(
+        "--seed_seen_store",
+        default=False,
+        type=lambda x: x.lower() == "true",
+        help="Seed the seen-id store from the item table before scraping.",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        default=None,
+        help="Directory of the run checkpoint, disabled if unset.",
+    )
+    parser.add_argument(
+        "--resume",
+        default=False,
+        type=lambda x: x.lower() == "true",
+        help="Resume from the checkpoint without resetting staging tables.",
+    )
+    parser.add_argument(
+        "--archive",
+        default=None,
+        help="Directory archiving raw search and filter responses, disabled if unset.",
+    )
+    parser.add_argument(
+        "--replay",
+        default=None,
+        help="Archive directory to parse and upload instead of scraping.",
+    )
+    parser.add_argument(
+        "--metrics",
+        default=None,
+        help="JSON file receiving the run metrics summary.",
+    )
+    parser.add_argument(
+        "--prometheus",
+        default=None,
+        help="Text file receiving the run metrics in Prometheus format.",
+    )
+    parser.add_argument(
+        "--profile",
+        choices=src.metrics.PROFILERS,
+        default=None,
+        help="Profile the run with cProfile (main thread) or a stack sampler.",
+    )
+    parser.add_argument(
+        "--profile_path",
+        default="profile.out",
+        help="Output of --profile: pstats dump or collapsed stacks.",
+    )
     args = parser.parse_args()
     
     if args.filter_by == "None":
@@ -38,49 +239,296 @@ def parse_args():
     return vars(args)
 
 
-def initialize_clients() -> Tuple:
-    secrets = json.loads(os.getenv("SECRETS_JSON"))
-    gcp_credentials = secrets.get("GCP_CREDENTIALS")
+def initialize_clients(
+    rate: float = 0,
+    json_backend: str = "auto",
+    typed_decode: bool = False,
+    metrics: src.metrics.Metrics = None,
+    archive: src.vinted.ResponseArchive = None,
+    replay: bool = False,
+    summary_decode: bool = False,
+    use_bigquery: bool = True,
+    fake_bigquery: bool = False,
+) -> Tuple:
+    rate_limiter = src.vinted.RateLimiter(rate=rate) if rate > 0 else None
 
-    bq_client = src.bigquery.init_client(credentials_dict=gcp_credentials)
-    vinted_client = src.vinted.Vinted(domain=DOMAIN)
+    bq_client = None
+
+    if fake_bigquery:
+        bq_client = src.fake_bigquery.FakeClient()
+    elif use_bigquery:
+        secrets = json.loads(os.getenv("SECRETS_JSON"))
+        gcp_credentials = secrets.get("GCP_CREDENTIALS")
+        bq_client = src.bigquery.init_client(credentials_dict=gcp_credentials)
+
+    if replay:
+        return bq_client, None
+
+    vinted_client = src.vinted.Vinted(
+        domain=DOMAIN,
+        rate_limiter=rate_limiter,
+        decoder=src.vinted.Decoder(json_backend, typed_decode, summary_decode),
+        metrics=metrics,
+        archive=archive,
+    )
 
     return bq_client, vinted_client
 
 
-def load_catalogs(women: bool) -> List[Dict]:
+def initialize_sink(
+    sink: str, sink_path: str, upload_mode: str, promotion: str
+) -> src.sinks.Sink:
+    if sink == "jsonl":
+        return src.sinks.JsonlSink(sink_path)
+
+    if sink == "parquet":
+        return src.sinks.ParquetSink(sink_path)
+
+    if sink == "sqlite":
+        return src.sinks.SQLiteSink(sink_path)
+
+    return src.sinks.BigQuerySink(
+        client=bq_client, upload_mode=upload_mode, promotion=promotion
+    )
+
+
+def load_catalogs(
+    women: bool, seed: int = None, shard_index: int = 0, shard_count: int = 1
+) -> src.catalogs.CatalogStream:
     conditions = [
         f"women = {women}", 
         "is_valid = TRUE", 
         "is_active = TRUE"
     ]
 
-    return src.bigquery.load_table(
+    return src.catalogs.CatalogStream.from_table(
         client=bq_client,
         table_id=src.enums.CATALOG_TABLE_ID,
         conditions=conditions,
-        order_by="RAND()",
+        seed=seed,
+        shard_index=shard_index,
+        shard_count=shard_count,
     )
 
 
-def main(women: bool, only_vintage: bool, filter_by: str = None):
+def promote_shards(sink: src.sinks.Sink, shard_count: int) -> int:
+    num_inserted = 0
+
+    for shard_index in range(shard_count):
+        inserted = sink.merge_from_staging(
+            [src.enums.ITEM_TABLE_ID, src.enums.IMAGE_TABLE_ID],
+            REFERENCE_FIELD,
+            src.enums.SHARD_STAGING_SUFFIX.format(shard_index),
+        )
+        print(f"shard: {shard_index} | inserted: {inserted}")
+        num_inserted += max(inserted, 0)
+
+    return num_inserted
+
+
+async def run_async(
+    scraper: src.scraper.VintedScraper,
+    catalogs: Iterable[Dict],
+    filter_by: str,
+    only_vintage: bool,
+    women: bool,
+    concurrency: int,
+):
+    async with src.vinted.AsyncVinted(
+        domain=DOMAIN,
+        max_concurrency=concurrency,
+        max_per_host=min(concurrency, MAX_REQUESTS_PER_HOST),
+        rate_limiter=scraper.vinted_client.rate_limiter,
+        decoder=scraper.vinted_client.decoder,
+        metrics=scraper.metrics,
+        archive=scraper.vinted_client.archive,
+    ) as async_client:
+        await scraper.run_async(
+            vinted_client=async_client,
+            catalogs=catalogs,
+            filter_by=filter_by,
+            only_vintage=only_vintage,
+            women=women,
+            max_catalogs=MAX_CATALOGS_IN_FLIGHT,
+        )
+
+
+def load_seen_store(directory: str, seed: bool) -> src.seen.SeenStore:
+    seen_store = src.seen.SeenStore(directory)
+
+    if seed:
+        rows = src.bigquery.load_table(
+            client=bq_client,
+            table_id=src.enums.ITEM_TABLE_ID,
+            fields=[REFERENCE_FIELD],
+            to_list=False,
+        )
+        seen_store.update(row[REFERENCE_FIELD] for row in rows)
+        seen_store.flush()
+
+    print(f"seen store: {directory} | ids: {len(seen_store)}")
+
+    return seen_store
+
+
+def main(
+    women: bool,
+    only_vintage: bool,
+    filter_by: str = None,
+    concurrency: int = 0,
+    seen_store: str = None,
+    dedup_index: str = "set",
+    seed_seen_store: bool = False,
+    max_pages: int = 1,
+    filter_cache: str = None,
+    rate: float = 0,
+    upload_workers: int = 0,
+    upload_mode: str = "stream",
+    sink: str = "bigquery",
+    sink_path: str = "data",
+    promotion: str = "insert",
+    seed: int = None,
+    shard_index: int = 0,
+    shard_count: int = 1,
+    merge_shards: bool = False,
+    checkpoint: str = None,
+    resume: bool = False,
+    json_backend: str = "auto",
+    typed_decode: bool = False,
+    stream_rows: int = 0,
+    metrics: str = None,
+    prometheus: str = None,
+    profile: str = None,
+    profile_path: str = "profile.out",
+    archive: str = None,
+    replay: str = None,
+    parse_workers: int = 0,
+    watermarks: str = None,
+    planner: str = None,
+    request_budget: int = 10,
+    price_splits: str = None,
+    fake_bigquery: bool = False,
+):
     global bq_client, vinted_client
-    bq_client, vinted_client = initialize_clients()
-    catalogs = load_catalogs(women)
-    print(f"women: {women} | filter_by: {filter_by} | catalogs: {len(catalogs)}")
+    run_metrics = src.metrics.Metrics()
+    response_archive = (
+        src.vinted.ResponseArchive(replay or archive) if replay or archive else None
+    )
+    bq_client, vinted_client = initialize_clients(
+        rate,
+        json_backend,
+        typed_decode,
+        run_metrics,
+        response_archive,
+        replay is not None,
+        parse_workers > 0,
+        # Catalogs and seen store seeds are read from BigQuery, replays and
+        # local sinks need no credentials otherwise.
+        use_bigquery=(
+            sink == "bigquery"
+            or replay is None
+            or bool(seen_store and seed_seen_store)
+        ),
+        fake_bigquery=fake_bigquery,
+    )
+
+    if merge_shards:
+        sink = initialize_sink(sink, sink_path, upload_mode, promotion)
+        print(f"inserted: {promote_shards(sink, shard_count)}")
+        sink.close()
+        return
+
+    if replay:
+        print(f"replay: {replay} | responses: {len(response_archive)}")
+    else:
+        catalogs = load_catalogs(women, seed, shard_index, shard_count)
+        print(
+            f"women: {women} | filter_by: {filter_by} | catalogs: {catalogs.total} | "
+            f"shard: {shard_index}/{shard_count}"
+        )
 
     scraper = src.scraper.VintedScraper(
-        bq_client=bq_client,
+        sink=initialize_sink(sink, sink_path, upload_mode, promotion),
         vinted_client=vinted_client,
         insert_every_catalog=INSERT_EVERY_CATALOG,
+        dedup_index=DEDUP_INDEXES[dedup_index],
+        seen_store=load_seen_store(seen_store, seed_seen_store) if seen_store else None,
+        max_pages=max_pages or None,
+        filter_cache=(
+            src.cache.FilterCache(filter_cache, ttl=FILTER_CACHE_TTL)
+            if filter_cache
+            else None
+        ),
+        upload_workers=upload_workers,
+        staging_suffix=(
+            src.enums.SHARD_STAGING_SUFFIX.format(shard_index)
+            if shard_count > 1
+            else src.enums.STAGING_SUFFIX
+        ),
+        promote_staging=shard_count == 1,
+        checkpoint=src.checkpoint.Checkpoint(checkpoint) if checkpoint else None,
+        resume=resume,
+        stream_rows=stream_rows or None,
+        metrics=run_metrics,
+        parse_pool=(
+            src.parse_pool.ParsePool(parse_workers, json_backend, typed_decode)
+            if parse_workers > 0
+            else None
+        ),
+        watermarks=(
+            src.watermarks.Watermarks(watermarks) if watermarks and not replay else None
+        ),
+        planner=(
+            src.planner.FilterPlanner(planner, budget=request_budget)
+            if planner and not replay
+            else None
+        ),
+        partitioner=(
+            src.partition.PricePartitioner(price_splits)
+            if price_splits and not replay
+            else None
+        ),
     )
 
-    scraper.run(
-        catalogs=catalogs,
-        filter_by=filter_by,
-        only_vintage=only_vintage,
-        women=women,
-    )
+    with src.metrics.profile(profile, profile_path):
+        if replay:
+            scraper.replay(
+                response_archive,
+                women=women,
+                decoder=src.vinted.Decoder(json_backend, typed_decode),
+            )
+        elif concurrency > 0:
+            asyncio.run(
+                run_async(
+                    scraper, catalogs, filter_by, only_vintage, women, concurrency
+                )
+            )
+        else:
+            scraper.run(
+                catalogs=catalogs,
+                filter_by=filter_by,
+                only_vintage=only_vintage,
+                women=women,
+            )
+
+    if vinted_client is not None and vinted_client.rate_limiter is not None:
+        print(f"rate limiter: {vinted_client.rate_limiter.stats()}")
+
+    print(json.dumps(run_metrics.summary(), indent=2))
+
+    if metrics:
+        run_metrics.write_json(metrics)
+
+    if prometheus:
+        run_metrics.write_prometheus(prometheus)
+
+    scraper.close()
+
+    if fake_bigquery:
+        print(f"fake bigquery: { {t: len(rows) for t, rows in bq_client.tables.items()} }")
+
+    if response_archive is not None:
+        response_archive.close()
 
 
 if __name__ == "__main__":
@@ -1 +1 @@
-from . import parse, utils, bigquery, enums, vinted, scraper
+from . import parse, utils, bigquery, fake_bigquery, enums, vinted, dedup, rows, batch, parse_pool, seen, cache, metrics, writer, checkpoint, watermarks, planner, partition, sinks, catalogs, scraper
@@ -0,0 +1,209 @@
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Type
+
+import os, datetime
+
+from .dedup import DedupIndex
+from .parse import (
+    _parse_brand,
+    _parse_currency,
+    _parse_likes,
+    _parse_price,
+    _parse_size,
+)
+from .rows import Row, ItemRow, ImageRow, LikesRow, ItemDetailsRow
+
+
+class Columns:
+    def __init__(self, row_type: Type[Row], data: Optional[Dict[str, List]] = None):
+        self.row_type = row_type
+        self.names = row_type.columns()
+        self.data = data if data is not None else {name: [] for name in self.names}
+
+    def __len__(self) -> int:
+        return len(self.data[self.names[0]])
+
+    def __getitem__(self, name: str) -> List:
+        return self.data[name]
+
+    def extend(self, other: "Columns") -> None:
+        for name in self.names:
+            self.data[name].extend(other.data[name])
+
+    def take(self, indices: Iterable[int]) -> "Columns":
+        indices = list(indices)
+
+        return Columns(
+            self.row_type,
+            {name: [values[i] for i in indices] for name, values in self.data.items()},
+        )
+
+    def to_rows(self) -> List[Dict]:
+        names = self.names
+        return [dict(zip(names, values)) for values in self.values()]
+
+    def to_records(self) -> List[Row]:
+        return [self.row_type(*values) for values in self.values()]
+
+    def values(self) -> Iterator[Tuple]:
+        return zip(*(self.data[name] for name in self.names))
+
+    def to_arrow(self):
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise ImportError("pyarrow is required for Arrow record batches")
+
+        return pa.RecordBatch.from_pydict(
+            self.data, schema=self.row_type.arrow_schema()
+        )
+
+
+class ItemBatch:
+    def __init__(
+        self,
+        items: Optional[Columns] = None,
+        images: Optional[Columns] = None,
+        likes: Optional[Columns] = None,
+        item_details: Optional[Columns] = None,
+    ):
+        self.items = items or Columns(ItemRow)
+        self.images = images or Columns(ImageRow)
+        self.likes = likes or Columns(LikesRow)
+        self.item_details = item_details or Columns(ItemDetailsRow)
+        self.num_duplicates = 0
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def extend(self, other: "ItemBatch") -> None:
+        for columns, other_columns in zip(self.tables(), other.tables()):
+            columns.extend(other_columns)
+
+        self.num_duplicates += other.num_duplicates
+
+    def tables(self) -> List[Columns]:
+        return [self.items, self.images, self.likes, self.item_details]
+
+    def take(self, indices: Iterable[int]) -> "ItemBatch":
+        indices = list(indices)
+        return ItemBatch(*(columns.take(indices) for columns in self.tables()))
+
+
+def parse_items(
+    items: List[Dict],
+    catalog_id: int,
+    visited: DedupIndex,
+    material_id: Optional[int] = None,
+    pattern_id: Optional[int] = None,
+    color_id: Optional[int] = None,
+    seen: Optional[DedupIndex] = None,
+) -> ItemBatch:
+    vinted_ids, titles, item_urls, image_urls = [], [], [], []
+    prices, currencies, brands, sizes, conditions, likes = [], [], [], [], [], []
+    batch_ids = set()
+    num_duplicates = 0
+
+    for item in items:
+        try:
+            vinted_id = item.get("id")
+            if vinted_id is None:
+                continue
+
+            vinted_id = str(vinted_id)
+            if (
+                vinted_id in batch_ids
+                or vinted_id in visited
+                or (seen is not None and vinted_id in seen)
+            ):
+                num_duplicates += 1
+                continue
+
+            image_url = (item.get("photo") or {}).get("url")
+            item_url = item.get("url")
+            if not image_url or not item_url:
+                continue
+
+        except Exception:
+            continue
+
+        batch_ids.add(vinted_id)
+        vinted_ids.append(vinted_id)
+        titles.append(item.get("title"))
+        item_urls.append(item_url)
+        image_urls.append(image_url)
+        prices.append(_parse_price(item))
+        currencies.append(_parse_currency(item))
+        brands.append(_parse_brand(item))
+        sizes.append(_parse_size(item))
+        conditions.append(item.get("status"))
+        likes.append(_parse_likes(item))
+
+    n = len(vinted_ids)
+    now = datetime.datetime.now()
+    created_at = [now.isoformat()] * n
+    uuids = uuid4_batch(2 * n)
+    item_ids = uuids[:n]
+
+    batch = ItemBatch(
+        items=Columns(
+            ItemRow,
+            {
+                "id": item_ids,
+                "vinted_id": vinted_ids,
+                "catalog_id": [catalog_id] * n,
+                "title": titles,
+                "url": item_urls,
+                "price": prices,
+                "currency": currencies,
+                "brand": brands,
+                "size": sizes,
+                "condition": conditions,
+                "is_available": [True] * n,
+                "created_at": created_at,
+                "updated_at": created_at,
+                "unix_created_at": [int(now.timestamp())] * n,
+            },
+        ),
+        images=Columns(
+            ImageRow,
+            {
+                "id": uuids[n:],
+                "vinted_id": vinted_ids,
+                "url": image_urls,
+                "nobg": [False] * n,
+                "size": ["original"] * n,
+                "created_at": created_at,
+            },
+        ),
+        likes=Columns(
+            LikesRow,
+            {"vinted_id": vinted_ids, "count": likes, "created_at": created_at},
+        ),
+        item_details=Columns(
+            ItemDetailsRow,
+            {
+                "item_id": item_ids,
+                "material_id": [material_id] * n,
+                "pattern_id": [pattern_id] * n,
+                "color_id": [color_id] * n,
+                "created_at": created_at,
+            },
+        ),
+    )
+    batch.num_duplicates = num_duplicates
+
+    return batch
+
+
+def uuid4_batch(n: int) -> List[str]:
+    """Random version 4 UUID strings drawn from a single os.urandom call."""
+    raw = bytearray(os.urandom(16 * n))
+    raw[6::16] = bytes((byte & 0x0F) | 0x40 for byte in raw[6::16])
+    raw[8::16] = bytes((byte & 0x3F) | 0x80 for byte in raw[8::16])
+    hexed = raw.hex()
+
+    return [
+        f"{hexed[i:i + 8]}-{hexed[i + 8:i + 12]}-{hexed[i + 12:i + 16]}-"
+        f"{hexed[i + 16:i + 20]}-{hexed[i + 20:i + 32]}"
+        for i in range(0, 32 * n, 32)
+    ]
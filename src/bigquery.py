@@ -1,8 +1,10 @@
-from typing import List, Dict, Union
+from typing import List, Dict, Union, Literal, Optional, Tuple
 
+import json, tempfile
 from google.oauth2 import service_account
 from google.cloud import bigquery
 from .enums import *
+from .rows import row_type
 
 
 def init_client(credentials_dict: Dict) -> bigquery.Client:
@@ -53,6 +55,23 @@ def load_table(
         return results
 
 
+def stream_table(
+    client: bigquery.Client,
+    table_id: str,
+    dataset_id: str = DATASET_ID,
+    conditions: List[str] = None,
+    fields: List[str] = None,
+    page_size: int = 500,
+) -> bigquery.table.RowIterator:
+    field_str = ", ".join(fields) if fields else "*"
+    query = f"SELECT {field_str} FROM `{PROJECT_ID}.{dataset_id}.{table_id}`"
+
+    if conditions:
+        query += f" WHERE {' AND '.join(conditions)}"
+
+    return client.query(query).result(page_size=page_size)
+
+
 def upload(
     client: bigquery.Client, dataset_id: str, table_id: str, rows: List[Dict]
 ) -> bool:
@@ -66,13 +85,86 @@ def upload(
         return False
 
 
+def load(
+    client: bigquery.Client,
+    dataset_id: str,
+    table_id: str,
+    rows: List[Dict],
+    source_format: Literal["json", "parquet"] = "json",
+) -> bool:
+    job_config = bigquery.LoadJobConfig(
+        source_format=LOAD_SOURCE_FORMATS[source_format],
+        write_disposition=bigquery.WriteDisposition.WRITE_APPEND,
+    )
+
+    try:
+        with tempfile.TemporaryFile() as file:
+            if source_format == "parquet":
+                _write_parquet(table_id, rows, file)
+            else:
+                _write_jsonl(rows, file)
+
+            file.seek(0)
+
+            load_job = client.load_table_from_file(
+                file,
+                destination=f"{PROJECT_ID}.{dataset_id}.{table_id}",
+                job_config=job_config,
+            )
+            load_job.result()
+
+        return True
+    except Exception as e:
+        print(e)
+        return False
+
+
+def write_rows(
+    client: bigquery.Client,
+    dataset_id: str,
+    table_id: str,
+    rows: List[Dict],
+    mode: UploadMode = "stream",
+) -> bool:
+    if mode == "load_json":
+        return load(client, dataset_id, table_id, rows, source_format="json")
+
+    if mode == "load_parquet":
+        return load(client, dataset_id, table_id, rows, source_format="parquet")
+
+    return upload(client, dataset_id, table_id, rows)
+
+
+def _write_jsonl(rows: List[Dict], file) -> None:
+    for row in rows:
+        file.write(json.dumps(row, ensure_ascii=False).encode("utf-8") + b"\n")
+
+
+def _write_parquet(table_id: str, rows: List[Dict], file) -> None:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("pyarrow is required for the load_parquet upload mode")
+
+    table_row_type = row_type(table_id)
+    schema = table_row_type.arrow_schema() if table_row_type is not None else None
+
+    pq.write_table(pa.Table.from_pylist(rows, schema=schema), file)
+
+
 def insert_staging_rows(
-    client: bigquery.Client, dataset_id: str, table_id: str, reference_field: str
+    client: bigquery.Client,
+    dataset_id: str,
+    table_id: str,
+    reference_field: str,
+    staging_suffix: str = STAGING_SUFFIX,
 ) -> int:
     query = f"""
     INSERT INTO `{PROJECT_ID}.{dataset_id}.{table_id}`
-    SELECT * FROM `{PROJECT_ID}.{dataset_id}.{table_id}_staging`
+    SELECT * FROM `{PROJECT_ID}.{dataset_id}.{table_id}{staging_suffix}`
     WHERE {reference_field} NOT IN (SELECT {reference_field} FROM `{PROJECT_ID}.{dataset_id}.{table_id}`)
+    QUALIFY ROW_NUMBER() OVER (PARTITION BY {reference_field} ORDER BY created_at) = 1
     ORDER BY RAND()
     """
 
@@ -86,11 +178,82 @@ def insert_staging_rows(
         return -1
 
 
+def merge_staging_rows(
+    client: bigquery.Client,
+    dataset_id: str,
+    table_ids: List[str],
+    reference_field: str,
+    watermarks: Optional[Dict[str, str]] = None,
+    staging_suffix: str = STAGING_SUFFIX,
+) -> Tuple[int, Dict[str, str]]:
+    watermarks = dict(watermarks or {})
+    declarations, merges, parameters = [], [], []
+
+    for i, table_id in enumerate(table_ids):
+        target = f"`{PROJECT_ID}.{dataset_id}.{table_id}`"
+        staging = f"`{PROJECT_ID}.{dataset_id}.{table_id}{staging_suffix}`"
+
+        declarations.append(
+            f"DECLARE high_{i} STRING DEFAULT "
+            f"(SELECT MAX(CAST(created_at AS STRING)) FROM {staging});"
+        )
+        merges.append(f"""
+            MERGE {target} T
+            USING (
+                SELECT * FROM {staging}
+                WHERE CAST(created_at AS STRING) > @low_{i}
+                AND CAST(created_at AS STRING) <= high_{i}
+                QUALIFY ROW_NUMBER() OVER (PARTITION BY {reference_field}) = 1
+            ) S
+            ON T.{reference_field} = S.{reference_field}
+            WHEN NOT MATCHED THEN INSERT ROW;
+            """)
+        parameters.append(
+            bigquery.ScalarQueryParameter(
+                f"low_{i}", "STRING", watermarks.get(table_id) or ""
+            )
+        )
+
+    high_fields = ", ".join(f"high_{i} AS {t}" for i, t in enumerate(table_ids))
+    query = "\n".join(
+        declarations
+        + ["BEGIN TRANSACTION;"]
+        + merges
+        + ["COMMIT TRANSACTION;", f"SELECT {high_fields};"]
+    )
+
+    try:
+        query_job = client.query(
+            query, job_config=bigquery.QueryJobConfig(query_parameters=parameters)
+        )
+        results = [dict(row) for row in query_job.result()]
+
+        for table_id, high in (results[0] if results else {}).items():
+            if high is not None:
+                watermarks[table_id] = high
+
+        num_affected_rows = sum(
+            child_job.num_dml_affected_rows or 0
+            for child_job in client.list_jobs(parent_job=query_job.job_id)
+            if getattr(child_job, "statement_type", None) == "MERGE"
+        )
+
+        return num_affected_rows, watermarks
+
+    except Exception as e:
+        print(e)
+        return -1, watermarks
+
+
 def reset_staging_table(
-    client: bigquery.Client, dataset_id: str, table_id: str, field_id: str
+    client: bigquery.Client,
+    dataset_id: str,
+    table_id: str,
+    field_id: str,
+    staging_suffix: str = STAGING_SUFFIX,
 ) -> bool:
     query = f"""
-    CREATE OR REPLACE TABLE `{PROJECT_ID}.{dataset_id}.{table_id}_staging` AS
+    CREATE OR REPLACE TABLE `{PROJECT_ID}.{dataset_id}.{table_id}{staging_suffix}` AS
     SELECT * FROM `{PROJECT_ID}.{dataset_id}.{table_id}` LIMIT 0;
     """
 
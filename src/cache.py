@@ -0,0 +1,84 @@
+from typing import Dict, Optional
+
+import json, time, sqlite3, threading
+
+
+class FilterCache:
+    def __init__(
+        self, path: str, ttl: float = 7 * 24 * 3600, max_entries: int = 10_000
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS filters (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS filters_accessed_at ON filters (accessed_at)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(catalog_id: int, **params) -> str:
+        return json.dumps({"catalog_id": catalog_id, **params}, sort_keys=True)
+
+    def get(self, key: str) -> Optional[Dict]:
+        now = time.time()
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM filters WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None or now - row[1] > self.ttl:
+                if row is not None:
+                    self._conn.execute("DELETE FROM filters WHERE key = ?", (key,))
+                    self._conn.commit()
+
+                self.misses += 1
+                return
+
+            self._conn.execute(
+                "UPDATE filters SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+
+        self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Dict) -> None:
+        now = time.time()
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO filters VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now),
+            )
+            self._conn.execute(
+                """
+                DELETE FROM filters WHERE key IN (
+                    SELECT key FROM filters ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM filters").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
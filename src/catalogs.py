@@ -0,0 +1,105 @@
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import random, queue, hashlib, threading
+from google.cloud import bigquery
+
+from .bigquery import stream_table
+from .enums import DATASET_ID
+
+_DONE = object()
+
+
+def shard_of(catalog_id: int, shard_count: int) -> int:
+    digest = hashlib.sha1(str(catalog_id).encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % shard_count
+
+
+class CatalogStream:
+    def __init__(
+        self,
+        pages: Iterable[Iterable[Dict]],
+        total: Optional[int] = None,
+        prefetch: int = 2,
+        shuffle_buffer: Optional[int] = None,
+        seed: Optional[int] = None,
+        shard_index: int = 0,
+        shard_count: int = 1,
+    ):
+        self.pages = pages
+        self.total = total if shard_count == 1 else None
+        self.prefetch = prefetch
+        self.shuffle_buffer = shuffle_buffer
+        self.seed = seed
+        self.shard_index = shard_index
+        self.shard_count = shard_count
+
+    @classmethod
+    def from_table(
+        cls,
+        client: bigquery.Client,
+        table_id: str,
+        dataset_id: str = DATASET_ID,
+        conditions: List[str] = None,
+        page_size: int = 500,
+        **kwargs,
+    ) -> "CatalogStream":
+        rows = stream_table(
+            client=client,
+            table_id=table_id,
+            dataset_id=dataset_id,
+            conditions=conditions,
+            page_size=page_size,
+        )
+
+        return cls(pages=rows.pages, total=rows.total_rows, **kwargs)
+
+    def __iter__(self) -> Iterator[Dict]:
+        rng = random.Random(self.seed)
+        buffer = []
+
+        for page in self._prefetch():
+            rows = [dict(row) for row in page if self._in_shard(row)]
+            # Without a set size the buffer holds one page, catalogs start
+            # flowing as soon as the first page is in.
+            limit = self.shuffle_buffer or len(rows)
+
+            for row in rows:
+                buffer.append(row)
+
+                if len(buffer) >= limit:
+                    index = rng.randrange(len(buffer))
+                    buffer[index], buffer[-1] = buffer[-1], buffer[index]
+                    yield buffer.pop()
+
+        rng.shuffle(buffer)
+        yield from buffer
+
+    def _in_shard(self, row: Dict) -> bool:
+        if self.shard_count == 1:
+            return True
+
+        return shard_of(row["id"], self.shard_count) == self.shard_index
+
+    def _prefetch(self) -> Iterator[Iterable[Dict]]:
+        pages = queue.Queue(maxsize=self.prefetch)
+
+        def produce():
+            try:
+                for page in self.pages:
+                    pages.put(list(page))
+            except Exception as e:
+                pages.put(e)
+            finally:
+                pages.put(_DONE)
+
+        threading.Thread(target=produce, daemon=True).start()
+
+        while True:
+            page = pages.get()
+
+            if page is _DONE:
+                return
+            if isinstance(page, Exception):
+                raise page
+
+            yield page
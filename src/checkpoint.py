@@ -0,0 +1,68 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import os, json
+from array import array
+
+
+class Checkpoint:
+    def __init__(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+
+        self.directory = directory
+        self.state_path = os.path.join(directory, "state.json")
+        self.seen_path = os.path.join(directory, "seen.bin")
+        self.pending_path = os.path.join(directory, "pending.json")
+
+    def save(self, state: Dict, seen: Iterable[int]) -> None:
+        ids = array("q", seen)
+        state = {**state, "num_seen": len(ids)}
+
+        with open(self.seen_path + ".tmp", "wb") as file:
+            ids.tofile(file)
+            file.flush()
+            os.fsync(file.fileno())
+
+        os.replace(self.seen_path + ".tmp", self.seen_path)
+        self._write_json(self.state_path, state)
+
+    def save_pending(self, pending: Dict[int, List[Dict]]) -> None:
+        self._write_json(
+            self.pending_path,
+            [
+                {"catalog_id": catalog_id, "search_kwargs": search_kwargs}
+                for catalog_id, search_kwargs in pending.items()
+            ],
+        )
+
+    def load(self) -> Optional[Tuple[Dict, array, Dict[int, List[Dict]]]]:
+        if not os.path.exists(self.state_path):
+            return
+
+        with open(self.state_path, "r", encoding="utf-8") as file:
+            state = json.load(file)
+
+        seen = array("q")
+        with open(self.seen_path, "rb") as file:
+            seen.fromfile(file, state["num_seen"])
+
+        pending = {}
+        if os.path.exists(self.pending_path):
+            with open(self.pending_path, "r", encoding="utf-8") as file:
+                for entry in json.load(file):
+                    pending[entry["catalog_id"]] = entry["search_kwargs"]
+
+        return state, seen, pending
+
+    def clear(self) -> None:
+        for path in [self.state_path, self.seen_path, self.pending_path]:
+            if os.path.exists(path):
+                os.remove(path)
+
+    @staticmethod
+    def _write_json(path: str, data) -> None:
+        with open(path + ".tmp", "w", encoding="utf-8") as file:
+            json.dump(data, file)
+            file.flush()
+            os.fsync(file.fileno())
+
+        os.replace(path + ".tmp", path)
@@ -0,0 +1,146 @@
+from typing import Iterator, Set
+
+import sys
+from array import array
+from itertools import chain
+
+_EMPTY = -1
+_MULTIPLIER = 0x9E3779B97F4A7C15
+_MASK_64 = (1 << 64) - 1
+# Vinted ids are 10 to 11 digit ints, all of the same object size.
+_ID_SIZE = sys.getsizeof(10**10)
+
+
+class DedupIndex:
+    def add(self, key: int | str) -> None:
+        raise NotImplementedError
+
+    def __contains__(self, key: int | str) -> bool:
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def __iter__(self) -> Iterator[int]:
+        raise NotImplementedError
+
+    @property
+    def nbytes(self) -> int:
+        raise NotImplementedError
+
+
+class SetIndex(DedupIndex):
+    def __init__(self) -> None:
+        self._keys: Set[int] = set()
+
+    def add(self, key: int | str) -> None:
+        self._keys.add(int(key))
+
+    def __contains__(self, key: int | str) -> bool:
+        return int(key) in self._keys
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._keys)
+
+    @property
+    def nbytes(self) -> int:
+        # Estimated from the count, summing over every key made each call O(n).
+        return sys.getsizeof(self._keys) + len(self._keys) * _ID_SIZE
+
+
+class IntHashSet(DedupIndex):
+    def __init__(self, capacity: int = 1024, max_load: float = 0.5) -> None:
+        self._bits = max(capacity - 1, 1).bit_length()
+        self._slots = array("q", [_EMPTY]) * (1 << self._bits)
+        self._max_load = max_load
+        self._size = 0
+
+    def add(self, key: int | str) -> None:
+        key = int(key)
+
+        if self._insert(self._slots, self._bits, key):
+            self._size += 1
+
+            if self._size > self._max_load * len(self._slots):
+                self._grow()
+
+    def __contains__(self, key: int | str) -> bool:
+        key = int(key)
+        slots, mask = self._slots, len(self._slots) - 1
+        index = self._index(key, self._bits)
+
+        while True:
+            slot = slots[index]
+
+            if slot == key:
+                return True
+            if slot == _EMPTY:
+                return False
+
+            index = (index + 1) & mask
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator[int]:
+        return (slot for slot in self._slots if slot != _EMPTY)
+
+    @property
+    def nbytes(self) -> int:
+        return sys.getsizeof(self._slots)
+
+    def _grow(self) -> None:
+        bits = self._bits + 1
+        slots = array("q", [_EMPTY]) * (1 << bits)
+
+        for key in self:
+            self._insert(slots, bits, key)
+
+        self._slots, self._bits = slots, bits
+
+    @classmethod
+    def _insert(cls, slots: array, bits: int, key: int) -> bool:
+        if key < 0:
+            raise ValueError(f"IntHashSet only stores non-negative ids, got {key}")
+
+        mask = len(slots) - 1
+        index = cls._index(key, bits)
+
+        while True:
+            slot = slots[index]
+
+            if slot == key:
+                return False
+            if slot == _EMPTY:
+                slots[index] = key
+                return True
+
+            index = (index + 1) & mask
+
+    @staticmethod
+    def _index(key: int, bits: int) -> int:
+        return ((key * _MULTIPLIER) & _MASK_64) >> (64 - bits)
+
+
+class UnionIndex(DedupIndex):
+    def __init__(self, *indexes: DedupIndex) -> None:
+        self.indexes = [index for index in indexes if index is not None]
+
+    def add(self, key: int | str) -> None:
+        self.indexes[0].add(key)
+
+    def __contains__(self, key: int | str) -> bool:
+        return any(key in index for index in self.indexes)
+
+    def __len__(self) -> int:
+        return sum(len(index) for index in self.indexes)
+
+    def __iter__(self) -> Iterator[int]:
+        return chain.from_iterable(self.indexes)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(index.nbytes for index in self.indexes)
@@ -1,3 +1,6 @@
+from typing import Literal
+
+
 N_ITEMS_MAX = 960
 
 
@@ -11,11 +14,17 @@ CATEGORY_TABLE_ID = "category"
 LIKES_TABLE_ID = "likes"
 ITEM_DETAILS_TABLE_ID = "item_details"
 
-STAGING_ITEM_TABLE_ID = "item_staging"
-STAGING_IMAGE_TABLE_ID = "image_staging"
+STAGING_SUFFIX = "_staging"
+STAGING_ITEM_TABLE_ID = ITEM_TABLE_ID + STAGING_SUFFIX
+STAGING_IMAGE_TABLE_ID = IMAGE_TABLE_ID + STAGING_SUFFIX
+SHARD_STAGING_SUFFIX = STAGING_SUFFIX + "_shard{}"
 
 CATALOG_FIELDS = ["id", "title", "code", "url", "women"]
 VALID_FILTER_KEYS = ["brand", "color", "material", "patterns"]
 
 DESIGNER_CATALOG_IDS = [2984, 2985, 2986, 2987, 2990, 2991, 2992]
 VINTAGE_BRAND_ID = 14803
+
+UPLOAD_MODES = ["stream", "load_json", "load_parquet"]
+UploadMode = Literal["stream", "load_json", "load_parquet"]
+LOAD_SOURCE_FORMATS = {"json": "NEWLINE_DELIMITED_JSON", "parquet": "PARQUET"}
@@ -0,0 +1,83 @@
+from typing import Iterator, List, Dict, Optional
+from collections import defaultdict
+
+import io, json
+
+
+class FakeRowIterator(list):
+    def __init__(self, rows: List[Dict], page_size: Optional[int] = None):
+        super().__init__(rows)
+        self.total_rows = len(rows)
+        self.page_size = page_size or max(1, len(rows))
+
+    @property
+    def pages(self) -> Iterator[List[Dict]]:
+        for start in range(0, len(self), self.page_size):
+            yield self[start : start + self.page_size]
+
+
+class FakeQueryJob:
+    def __init__(self, query: str, rows: Optional[List[Dict]] = None):
+        self.job_id = f"fake-{id(self)}"
+        self.query = query
+        self.rows = rows or []
+        self.num_dml_affected_rows = 0
+
+    def result(self, page_size: Optional[int] = None) -> FakeRowIterator:
+        return FakeRowIterator(self.rows, page_size)
+
+
+class FakeLoadJob:
+    def __init__(self, destination: str, num_rows: int):
+        self.destination = destination
+        self.output_rows = num_rows
+
+    def result(self) -> "FakeLoadJob":
+        return self
+
+
+class FakeClient:
+    """In-memory stand-in for a BigQuery client, rows land in `tables`.
+
+    Queries return no rows, so it only suits runs that don't read from
+    BigQuery, e.g. replays into the BigQuery sink.
+    """
+
+    def __init__(self):
+        self.tables: Dict[str, List[Dict]] = defaultdict(list)
+        self.queries: List[str] = []
+        self.num_insert_requests = 0
+        self.num_load_jobs = 0
+
+    def insert_rows_json(self, table: str, json_rows: List[Dict]) -> List[Dict]:
+        self.num_insert_requests += 1
+        self.tables[self._table_id(table)].extend(json.loads(json.dumps(json_rows)))
+        return []
+
+    def load_table_from_file(
+        self, file_obj: io.IOBase, destination: str, job_config=None
+    ) -> FakeLoadJob:
+        source_format = getattr(job_config, "source_format", None)
+
+        if source_format == "PARQUET":
+            import pyarrow.parquet as pq
+
+            rows = pq.read_table(file_obj).to_pylist()
+        else:
+            rows = [json.loads(line) for line in file_obj.read().splitlines() if line]
+
+        self.num_load_jobs += 1
+        self.tables[self._table_id(destination)].extend(rows)
+
+        return FakeLoadJob(destination, len(rows))
+
+    def query(self, query: str, job_config=None) -> FakeQueryJob:
+        self.queries.append(query)
+        return FakeQueryJob(query)
+
+    def list_jobs(self, parent_job: Optional[str] = None) -> List[FakeQueryJob]:
+        return []
+
+    @staticmethod
+    def _table_id(table: str) -> str:
+        return str(table).split(".")[-1]
@@ -0,0 +1,261 @@
+from typing import Dict, Iterator, Optional, Sequence, Tuple
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+import os, sys, json, time, cProfile, threading
+from bisect import bisect_left
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+PROFILERS = ["cprofile", "sample"]
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th observation."""
+        rank = q * self.count
+        cumulative = 0
+
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            if cumulative >= rank:
+                return min(bound, self.max)
+
+        return self.max
+
+    def summary(self) -> Dict:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "mean": round(self.sum / self.count, 6) if self.count else 0.0,
+            "p50": round(self.quantile(0.5), 6),
+            "p95": round(self.quantile(0.95), 6),
+            "p99": round(self.quantile(0.99), 6),
+            "max": round(self.max, 6),
+        }
+
+
+class Metrics:
+    def __init__(
+        self, prefix: str = "vinted", buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        self.prefix = prefix
+        self.buckets = buckets
+        self.counters: Dict[str, Dict[Labels, float]] = defaultdict(Counter)
+        self.gauges: Dict[str, Dict[Labels, float]] = defaultdict(dict)
+        self.histograms: Dict[str, Dict[Labels, Histogram]] = defaultdict(dict)
+
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _labels(labels: Dict) -> Labels:
+        return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        with self._lock:
+            self.counters[name][self._labels(labels)] += value
+
+    def set(self, name: str, value: float, **labels) -> None:
+        with self._lock:
+            self.gauges[name][self._labels(labels)] = value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        key = self._labels(labels)
+
+        with self._lock:
+            if key not in self.histograms[name]:
+                self.histograms[name][key] = Histogram(self.buckets)
+
+            self.histograms[name][key].observe(value)
+
+    @contextmanager
+    def time(self, name: str, **labels) -> Iterator[None]:
+        started = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def record_request(
+        self, endpoint: str, status_code: int, seconds: float, num_bytes: int
+    ) -> None:
+        self.observe("request_seconds", seconds, endpoint=endpoint)
+        self.inc("requests", endpoint=endpoint, status=status_code)
+        self.inc("bytes_downloaded", num_bytes, endpoint=endpoint)
+
+    def histogram(self, name: str, **labels) -> Histogram:
+        with self._lock:
+            return self.histograms[name].get(
+                self._labels(labels), Histogram(self.buckets)
+            )
+
+    def total(self, name: str) -> float:
+        with self._lock:
+            return sum(self.counters[name].values())
+
+    def summary(self) -> Dict:
+        with self._lock:
+            return {
+                "counters": {
+                    name: {_format_labels(key): value for key, value in values.items()}
+                    for name, values in self.counters.items()
+                },
+                "gauges": {
+                    name: {_format_labels(key): value for key, value in values.items()}
+                    for name, values in self.gauges.items()
+                },
+                "histograms": {
+                    name: {
+                        _format_labels(key): histogram.summary()
+                        for key, histogram in values.items()
+                    }
+                    for name, values in self.histograms.items()
+                },
+            }
+
+    def to_prometheus(self) -> str:
+        lines = []
+
+        with self._lock:
+            for name, values in self.counters.items():
+                lines.append(f"# TYPE {self.prefix}_{name}_total counter")
+                for key, value in values.items():
+                    lines.append(
+                        f"{self.prefix}_{name}_total{_prom_labels(key)} {value}"
+                    )
+
+            for name, values in self.gauges.items():
+                lines.append(f"# TYPE {self.prefix}_{name} gauge")
+                for key, value in values.items():
+                    lines.append(f"{self.prefix}_{name}{_prom_labels(key)} {value}")
+
+            for name, values in self.histograms.items():
+                metric = f"{self.prefix}_{name}"
+                lines.append(f"# TYPE {metric} histogram")
+
+                for key, histogram in values.items():
+                    cumulative = 0
+                    bounds = [str(bound) for bound in histogram.buckets] + ["+Inf"]
+
+                    for bound, count in zip(bounds, histogram.counts):
+                        cumulative += count
+                        bucket_key = key + (("le", bound),)
+                        lines.append(
+                            f"{metric}_bucket{_prom_labels(bucket_key)} {cumulative}"
+                        )
+
+                    lines.append(f"{metric}_sum{_prom_labels(key)} {histogram.sum}")
+                    lines.append(f"{metric}_count{_prom_labels(key)} {histogram.count}")
+
+        return "\n".join(lines) + "\n"
+
+    def write_json(self, path: str) -> None:
+        _write_text(path, json.dumps(self.summary(), indent=2))
+
+    def write_prometheus(self, path: str) -> None:
+        _write_text(path, self.to_prometheus())
+
+
+class Sampler:
+    """Samples every thread's stack, cProfile only follows the calling thread.
+
+    Stacks are written in the collapsed format read by flamegraph tools.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(
+                        f"{code.co_name} ({os.path.basename(code.co_filename)})"
+                    )
+                    frame = frame.f_back
+
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def write(self, path: str) -> None:
+        _write_text(
+            path,
+            "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common()),
+        )
+
+
+@contextmanager
+def profile(kind: Optional[str], path: Optional[str]) -> Iterator[None]:
+    if kind is None:
+        yield
+        return
+
+    if kind == "cprofile":
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+        try:
+            yield
+        finally:
+            profiler.disable()
+            profiler.dump_stats(path)
+
+        return
+
+    sampler = Sampler()
+    sampler.start()
+
+    try:
+        yield
+    finally:
+        sampler.stop()
+        sampler.write(path)
+
+
+def _format_labels(key: Labels) -> str:
+    return ",".join(f"{name}={value}" for name, value in key) or "total"
+
+
+def _prom_labels(key: Labels) -> str:
+    if not key:
+        return ""
+
+    return "{" + ",".join(f'{name}="{value}"' for name, value in key) + "}"
+
+
+def _write_text(path: str, text: str) -> None:
+    with open(path + ".tmp", "w", encoding="utf-8") as file:
+        file.write(text)
+
+    os.replace(path + ".tmp", path)
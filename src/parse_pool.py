@@ -0,0 +1,109 @@
+from typing import Optional, Tuple
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+
+import time
+
+from .vinted.decode import Decoder, JSONBackend
+from .vinted.endpoints import Endpoints
+from .batch import ItemBatch, parse_items
+from .dedup import SetIndex
+
+_decoder: Optional[Decoder] = None
+
+
+def _init_worker(backend: JSONBackend, typed: bool) -> None:
+    global _decoder
+    _decoder = Decoder(backend, typed)
+
+
+def _parse_shared(
+    name: str,
+    size: int,
+    catalog_id: int,
+    material_id: Optional[int],
+    pattern_id: Optional[int],
+    color_id: Optional[int],
+) -> Tuple[ItemBatch, int, float]:
+    started = time.perf_counter()
+
+    # The parent unlinks the block once the future is done.
+    shm = SharedMemory(name=name)
+
+    try:
+        content = shm.buf[:size]
+
+        try:
+            if _decoder.backend == "json":
+                content = bytes(content)
+
+            data = _decoder.decode(content, Endpoints.CATALOG_ITEMS)
+        except ValueError:
+            data = None
+        finally:
+            if isinstance(content, memoryview):
+                content.release()
+    finally:
+        shm.close()
+
+    if not isinstance(data, dict):
+        return ItemBatch(), 0, time.perf_counter() - started
+
+    items = data.get("items") or []
+    batch = parse_items(
+        items, catalog_id, SetIndex(), material_id, pattern_id, color_id
+    )
+
+    return batch, len(items), time.perf_counter() - started
+
+
+class ParsePool:
+    """Decodes and parses search pages in worker processes.
+
+    Page bytes are copied once into a shared memory block that the worker
+    decodes in place, parsed tables come back as pickled column lists.
+    Workers only dedup within a page, ids seen across pages are dropped by
+    the scraper when the batch returns.
+    """
+
+    def __init__(
+        self, num_workers: int, backend: JSONBackend = "auto", typed: bool = False
+    ):
+        self.num_workers = num_workers
+        self._executor = ProcessPoolExecutor(
+            max_workers=num_workers,
+            initializer=_init_worker,
+            initargs=(backend, typed),
+        )
+
+    def submit(
+        self,
+        content: bytes,
+        catalog_id: int,
+        material_id: Optional[int] = None,
+        pattern_id: Optional[int] = None,
+        color_id: Optional[int] = None,
+    ) -> Future:
+        shm = SharedMemory(create=True, size=max(1, len(content)))
+        shm.buf[: len(content)] = content
+
+        future = self._executor.submit(
+            _parse_shared,
+            shm.name,
+            len(content),
+            catalog_id,
+            material_id,
+            pattern_id,
+            color_id,
+        )
+        future.add_done_callback(lambda _: _release(shm))
+
+        return future
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _release(shm: SharedMemory) -> None:
+    shm.close()
+    shm.unlink()
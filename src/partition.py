@@ -0,0 +1,128 @@
+from typing import Dict, List, Optional
+
+import json, time, sqlite3, statistics, threading
+
+from .parse import _parse_price
+from .planner import is_saturated
+from .utils import search_key
+
+# Prices are in euros and slices are inclusive on both ends, so the next
+# slice starts one cent above the previous cut.
+PRICE_STEP = 0.01
+
+
+class PricePartitioner:
+    """Splits searches that hit the result cap into price slices.
+
+    A saturated slice is cut at the median price of its first page, the
+    newest items being a fair sample of the slice, and both halves are
+    searched again until each fits under the cap. The cut points found for
+    a search are kept so later runs start from the final slices.
+    """
+
+    def __init__(self, path: str, min_width: float = 1.0, max_slices: int = 64):
+        self.path = path
+        self.min_width = min_width
+        self.max_slices = max_slices
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS price_splits (
+                key TEXT PRIMARY KEY,
+                cuts TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """)
+        self._conn.commit()
+
+    def slices(self, search_kwargs: Dict) -> List[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT cuts FROM price_splits WHERE key = ?",
+                (search_key(search_kwargs),),
+            ).fetchone()
+
+        cuts = json.loads(row[0]) if row is not None else []
+        lower = [search_kwargs.get("price_from")] + [cut + PRICE_STEP for cut in cuts]
+        upper = cuts + [search_kwargs.get("price_to")]
+
+        return [
+            _price_slice(search_kwargs, price_from, price_to)
+            for price_from, price_to in zip(lower, upper)
+        ]
+
+    def split(self, slice_kwargs: Dict, data: Optional[Dict]) -> Optional[List[Dict]]:
+        """Both halves of a saturated slice, None when it fits or can't be cut."""
+        if not isinstance(data, dict) or not is_saturated(data):
+            return
+
+        price_from = slice_kwargs.get("price_from") or 0.0
+        price_to = slice_kwargs.get("price_to")
+
+        prices = [
+            price
+            for price in map(_parse_price, data.get("items") or [])
+            if price is not None
+        ]
+        cut = round(statistics.median(prices), 2) if prices else None
+
+        if cut is None or not price_from <= cut < (price_to or float("inf")):
+            if price_to is None:
+                return
+
+            cut = round((price_from + price_to) / 2, 2)
+
+        if price_to is not None and price_to - price_from < self.min_width:
+            return
+
+        return [
+            _price_slice(slice_kwargs, slice_kwargs.get("price_from"), cut),
+            _price_slice(slice_kwargs, cut + PRICE_STEP, price_to),
+        ]
+
+    def learn(self, search_kwargs: Dict, slices: List[Dict]) -> None:
+        cuts = sorted(
+            {
+                slice_kwargs["price_to"]
+                for slice_kwargs in slices
+                if slice_kwargs.get("price_to") is not None
+                and slice_kwargs.get("price_to") != search_kwargs.get("price_to")
+            }
+        )[: self.max_slices - 1]
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO price_splits VALUES (?, ?, ?)",
+                (search_key(search_kwargs), json.dumps(cuts), time.time()),
+            )
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM price_splits").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def unsliced(search_kwargs: Dict) -> Dict:
+    """The search a price slice was cut from, searches are planned without
+    price bounds.
+    """
+    return {
+        key: value
+        for key, value in search_kwargs.items()
+        if key not in ("price_from", "price_to")
+    }
+
+
+def _price_slice(
+    search_kwargs: Dict, price_from: Optional[float], price_to: Optional[float]
+) -> Dict:
+    return {
+        **search_kwargs,
+        "price_from": round(price_from, 2) if price_from is not None else None,
+        "price_to": round(price_to, 2) if price_to is not None else None,
+    }
@@ -0,0 +1,257 @@
+from typing import Callable, Dict, List, Optional, Tuple
+from dataclasses import dataclass
+
+import math, time, random, sqlite3, threading
+
+from .utils import search_key
+from .enums import N_ITEMS_MAX
+
+# Dimensions a saturated search is split by, fewest options first.
+SPLIT_FILTER_KEYS = ["color", "patterns", "material", "brand"]
+
+
+@dataclass(slots=True)
+class SearchYield:
+    requests: int = 0
+    new_items: int = 0
+    pages_new: int = 0
+    saturated: bool = False
+
+    def observe(self, num_new: int) -> None:
+        self.requests += 1
+        self.new_items += num_new
+        self.pages_new += num_new > 0
+
+
+def is_saturated(data: Dict) -> bool:
+    """Whether a search matched more items than the API lets us page through."""
+    pagination = data.get("pagination") or {}
+    total_entries = pagination.get("total_entries")
+
+    if total_entries is None:
+        total_entries = (pagination.get("total_pages") or 0) * (
+            pagination.get("per_page") or 0
+        )
+
+    return total_entries >= N_ITEMS_MAX
+
+
+class FilterPlanner:
+    """Chooses the searches of a catalog from the new items they yielded before.
+
+    Each search is an arm of a UCB1 bandit scored on decayed new items per
+    request, searches never run are tried first. Searches that hit the
+    result cap also compete with one search per option of the next filter
+    dimension. Picks are made until the request budget is spent, a search
+    split into price slices costs its depth once per slice. When slices are
+    counted, each search carries its share of the budget as max_requests
+    and the best one also gets what no pick could use.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        budget: int = 10,
+        exploration: float = 1.0,
+        decay: float = 0.8,
+    ):
+        self.path = path
+        self.budget = budget
+        self.exploration = exploration
+        self.decay = decay
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS yields (
+                catalog_id INTEGER NOT NULL,
+                key TEXT NOT NULL,
+                requests REAL NOT NULL,
+                new_items REAL NOT NULL,
+                pages_new INTEGER NOT NULL,
+                saturated INTEGER NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (catalog_id, key)
+            )
+            """)
+        self._conn.commit()
+
+    def plan(
+        self,
+        catalog_id: int,
+        filters: Dict,
+        filter_keys: List[str],
+        max_pages: Optional[int] = None,
+        num_slices: Optional[Callable[[Dict], int]] = None,
+    ) -> List[Dict]:
+        history = self._load(catalog_id)
+        base_search_kwargs = {"catalog_ids": [catalog_id], "per_page": N_ITEMS_MAX}
+
+        candidates = [
+            candidate
+            for filter_key in filter_keys
+            for option in filters.get(filter_key, {}).get("id", [])
+            for candidate in self._expand(
+                {**base_search_kwargs, f"{filter_key}_ids": [option]},
+                math.inf,
+                filters,
+                [filter_key],
+                history,
+            )
+        ]
+
+        if not candidates:
+            return [base_search_kwargs]
+
+        total_requests = sum(arm.requests for arm in history.values())
+
+        random.shuffle(candidates)
+        candidates.sort(
+            key=lambda candidate: self._score(
+                history.get(search_key(candidate[0])), candidate[1], total_requests
+            ),
+            reverse=True,
+        )
+
+        search_kwargs_list = []
+        num_requests = 0
+
+        for search_kwargs, _ in candidates:
+            if num_requests >= self.budget:
+                break
+
+            depth = self._depth(history.get(search_key(search_kwargs)), max_pages)
+            cost = depth * (num_slices(search_kwargs) if num_slices else 1)
+
+            if num_slices is not None:
+                if search_kwargs_list and num_requests + cost > self.budget:
+                    continue
+
+                search_kwargs = {**search_kwargs, "max_requests": cost}
+
+            search_kwargs_list.append({**search_kwargs, "max_pages": depth})
+            num_requests += cost
+
+        if num_slices is not None and num_requests < self.budget:
+            search_kwargs_list[0]["max_requests"] += self.budget - num_requests
+
+        return search_kwargs_list
+
+    def _expand(
+        self,
+        search_kwargs: Dict,
+        prior: float,
+        filters: Dict,
+        used_keys: List[str],
+        history: Dict[str, SearchYield],
+    ) -> List[Tuple[Dict, float]]:
+        """The search and, once it saturated, its splits along the next filter
+        dimension. Untried splits start from their parent's yield.
+        """
+        arm = history.get(search_key(search_kwargs))
+        if arm is None or not arm.saturated:
+            return [(search_kwargs, prior)]
+
+        split_key = next(
+            (
+                filter_key
+                for filter_key in SPLIT_FILTER_KEYS
+                if filter_key not in used_keys and filters.get(filter_key, {}).get("id")
+            ),
+            None,
+        )
+        if split_key is None:
+            return [(search_kwargs, prior)]
+
+        return [(search_kwargs, prior)] + [
+            child
+            for option in filters[split_key]["id"]
+            for child in self._expand(
+                {**search_kwargs, f"{split_key}_ids": [option]},
+                self._mean(arm),
+                filters,
+                used_keys + [split_key],
+                history,
+            )
+        ]
+
+    @staticmethod
+    def _mean(arm: SearchYield) -> float:
+        return arm.new_items / (arm.requests * N_ITEMS_MAX) if arm.requests > 0 else 0.0
+
+    def _score(
+        self, arm: Optional[SearchYield], prior: float, total_requests: float
+    ) -> float:
+        # UCB1 over new items per request, untried searches count as one
+        # request at their prior.
+        if arm is None or arm.requests <= 0:
+            mean, requests = prior, 1.0
+        else:
+            mean, requests = self._mean(arm), arm.requests
+
+        bonus = math.sqrt(2 * math.log(max(total_requests, 1)) / requests)
+
+        return mean + self.exploration * bonus
+
+    @staticmethod
+    def _depth(arm: Optional[SearchYield], max_pages: Optional[int]) -> int:
+        # One page past the last one that still had new items.
+        depth = 1 if arm is None else arm.pages_new + 1
+
+        return depth if max_pages is None else max(1, min(depth, max_pages))
+
+    def _load(self, catalog_id: int) -> Dict[str, SearchYield]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, requests, new_items, pages_new, saturated "
+                "FROM yields WHERE catalog_id = ?",
+                (catalog_id,),
+            ).fetchall()
+
+        return {
+            key: SearchYield(requests, new_items, pages_new, bool(saturated))
+            for key, requests, new_items, pages_new, saturated in rows
+        }
+
+    def record(self, catalog_id: int, yields: Dict[str, SearchYield]) -> None:
+        """Folds a run's yields into the history, older runs decay."""
+        if not yields:
+            return
+
+        now = time.time()
+
+        with self._lock:
+            self._conn.executemany(
+                """
+                INSERT INTO yields VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (catalog_id, key) DO UPDATE SET
+                    requests = requests * ? + excluded.requests,
+                    new_items = new_items * ? + excluded.new_items,
+                    pages_new = excluded.pages_new,
+                    saturated = excluded.saturated,
+                    updated_at = excluded.updated_at
+                """,
+                [
+                    (
+                        catalog_id,
+                        key,
+                        arm.requests,
+                        arm.new_items,
+                        arm.pages_new,
+                        arm.saturated,
+                        now,
+                        self.decay,
+                        self.decay,
+                    )
+                    for key, arm in yields.items()
+                ],
+            )
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM yields").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
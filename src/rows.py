@@ -0,0 +1,107 @@
+from typing import Dict, Iterable, List, Optional, Type, get_args
+from dataclasses import dataclass, fields
+
+from .enums import (
+    ITEM_TABLE_ID,
+    IMAGE_TABLE_ID,
+    LIKES_TABLE_ID,
+    ITEM_DETAILS_TABLE_ID,
+    STAGING_SUFFIX,
+)
+
+
+@dataclass(slots=True)
+class Row:
+    @classmethod
+    def columns(cls) -> List[str]:
+        return [field.name for field in fields(cls)]
+
+    def to_dict(self) -> Dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def arrow_schema(cls):
+        """Fixed schema, inferring it per batch types all-null columns as null."""
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise ImportError("pyarrow is required for Arrow schemas")
+
+        arrow_types = {
+            str: pa.string(),
+            int: pa.int64(),
+            float: pa.float64(),
+            bool: pa.bool_(),
+        }
+
+        return pa.schema(
+            [
+                pa.field(
+                    field.name,
+                    arrow_types[next(iter(get_args(field.type)), field.type)],
+                    nullable=type(None) in get_args(field.type),
+                )
+                for field in fields(cls)
+            ]
+        )
+
+
+@dataclass(slots=True)
+class ItemRow(Row):
+    id: str
+    vinted_id: str
+    catalog_id: int
+    title: Optional[str]
+    url: str
+    price: Optional[float]
+    currency: Optional[str]
+    brand: Optional[str]
+    size: Optional[str]
+    condition: Optional[str]
+    is_available: bool
+    created_at: str
+    updated_at: str
+    unix_created_at: int
+
+
+@dataclass(slots=True)
+class ImageRow(Row):
+    id: str
+    vinted_id: str
+    url: str
+    nobg: bool
+    size: str
+    created_at: str
+
+
+@dataclass(slots=True)
+class LikesRow(Row):
+    vinted_id: str
+    count: int
+    created_at: str
+
+
+@dataclass(slots=True)
+class ItemDetailsRow(Row):
+    item_id: str
+    material_id: Optional[int]
+    pattern_id: Optional[int]
+    color_id: Optional[int]
+    created_at: str
+
+
+ROW_TYPES: Dict[str, Type[Row]] = {
+    ITEM_TABLE_ID: ItemRow,
+    IMAGE_TABLE_ID: ImageRow,
+    LIKES_TABLE_ID: LikesRow,
+    ITEM_DETAILS_TABLE_ID: ItemDetailsRow,
+}
+
+
+def row_type(table_id: str) -> Optional[Type[Row]]:
+    """Row type of a table, staging and shard staging tables included."""
+    return ROW_TYPES.get(table_id.split(STAGING_SUFFIX)[0])
+
+
+def to_dicts(rows: Iterable[Row]) -> List[Dict]:
+    return [row.to_dict() for row in rows]
@@ -1,29 +1,89 @@
-from typing import List, Dict, Tuple, Optional, Iterable
+from typing import List, Dict, Tuple, Optional, Iterable, Iterator, Type, Sized
 
-import random
+import random, asyncio, threading
+from collections import deque
+from concurrent.futures import Future
+from itertools import groupby
 from tqdm import tqdm
-from google.cloud import bigquery
 
-from .vinted import Vinted, VintedResponse
-from .parse import parse_filters, parse_item
-from .utils import random_sleep, prepare_search_kwargs
-from .bigquery import insert_staging_rows, reset_staging_table, upload
+from .vinted import Vinted, AsyncVinted, VintedResponse, Decoder, ResponseArchive
+from .vinted.archive import ArchiveRecord
+from .vinted.endpoints import Endpoints
+from .vinted.utils import ends_search
+from .parse import parse_filters
+from .batch import Columns, ItemBatch, parse_items
+from .parse_pool import ParsePool
+from .rows import Row, to_dicts
+from .utils import random_sleep, prepare_search_kwargs, search_key
+from .sinks import Sink
+from .dedup import DedupIndex, SetIndex, UnionIndex
+from .seen import SeenStore
+from .cache import FilterCache
+from .writer import BackgroundWriter
+from .checkpoint import Checkpoint
+from .watermarks import Watermarks
+from .planner import FilterPlanner, SearchYield, is_saturated
+from .partition import PricePartitioner, unsliced
+from .metrics import Metrics
 from .enums import *
 
 
 class VintedScraper:
     def __init__(
         self,
-        bq_client: bigquery.Client,
+        sink: Sink,
         vinted_client: Vinted,
         insert_every_catalog: int,
+        dedup_index: Type[DedupIndex] = SetIndex,
+        seen_store: Optional[SeenStore] = None,
+        max_pages: Optional[int] = 1,
+        filter_cache: Optional[FilterCache] = None,
+        upload_workers: int = 0,
+        staging_suffix: str = STAGING_SUFFIX,
+        promote_staging: bool = True,
+        checkpoint: Optional[Checkpoint] = None,
+        checkpoint_every: int = 1,
+        resume: bool = False,
+        stream_rows: Optional[int] = None,
+        metrics: Optional[Metrics] = None,
+        parse_pool: Optional[ParsePool] = None,
+        watermarks: Optional[Watermarks] = None,
+        planner: Optional[FilterPlanner] = None,
+        partitioner: Optional[PricePartitioner] = None,
     ):
-        self.bq_client = bq_client
+        self.sink = sink
         self.vinted_client = vinted_client
         self.insert_every_catalog = insert_every_catalog
+        self.dedup_index = dedup_index
+        self.seen_store = seen_store
+        self.max_pages = max_pages
+        self.filter_cache = filter_cache
+        self.staging_suffix = staging_suffix
+        self.promote_staging = promote_staging
+        self.checkpoint = checkpoint
+        self.checkpoint_every = checkpoint_every
+        self.resume = resume
+        self.stream_rows = stream_rows
+        self.metrics = metrics or Metrics()
+        self.parse_pool = parse_pool
+        self.watermarks = watermarks
+        self.planner = planner
+        self.partitioner = partitioner
+
+        self.writer = (
+            BackgroundWriter(
+                write=self._write_rows,
+                on_written=self._on_written,
+                num_workers=upload_workers,
+            )
+            if upload_workers > 0
+            else None
+        )
 
         self._reference_field = "vinted_id"
         self._filter_batch_size = 1
+        self._rate_limiter = None
+        self._lock = threading.Lock()
 
         self.reset()
 
@@ -31,85 +91,737 @@ class VintedScraper:
         self.n = 0
         self.n_success = 0
         self.counter = 0
-        self.visited = []
+        self.visited = self.dedup_index()
         self.num_uploaded = 0
         self.num_inserted = 0
+        self.completed = set()
+        self.pending: Dict[int, List[Dict]] = {}
+        self.marks: Dict[int, Dict[str, Tuple[int, bool]]] = {}
+        self.staged: List[str] = []
+        self.yields: Dict[int, Dict[str, SearchYield]] = {}
 
     def run(
         self,
-        catalogs: List[Dict],
+        catalogs: Iterable[Dict],
         filter_by: str,
         only_vintage: bool,
         women: bool,
     ):
-        self._reset_staging()
-        loop = tqdm(iterable=catalogs, total=len(catalogs))
+        self._rate_limiter = self.vinted_client.rate_limiter
+        self._start()
+        loop = tqdm(
+            iterable=self._remaining(catalogs),
+            total=self._count_catalogs(catalogs),
+            initial=len(self.completed),
+        )
 
         for entry in loop:
-            self.counter += 1
-            catalog_title = entry.get("title")
             catalog_id = entry.get("id")
+            search_kwargs_list = self.pending.get(catalog_id)
 
-            filters_response = self.vinted_client.catalog_filters(
-                catalog_ids=[catalog_id]
+            if search_kwargs_list is None:
+                filters = self._load_filters(catalog_id)
+                search_kwargs_list = self._process_catalog_filters(
+                    catalog_id, filters, filter_by, only_vintage
+                )
+                self._save_pending(catalog_id, search_kwargs_list)
+
+            responses = (
+                pair
+                for search_kwargs in search_kwargs_list
+                for pair in self._search(search_kwargs)
+            )
+
+            self._process_catalog(entry, responses, loop, women)
+            self._complete(catalog_id)
+
+        self._finish()
+
+    async def run_async(
+        self,
+        vinted_client: AsyncVinted,
+        catalogs: Iterable[Dict],
+        filter_by: str,
+        only_vintage: bool,
+        women: bool,
+        max_catalogs: int = 4,
+    ):
+        self._rate_limiter = vinted_client.rate_limiter
+        self._start()
+        loop = tqdm(total=self._count_catalogs(catalogs), initial=len(self.completed))
+
+        catalogs_iter = self._remaining(catalogs)
+        entries = asyncio.Queue(maxsize=max_catalogs)
+        fetched = asyncio.Queue(maxsize=max_catalogs)
+
+        async def feed():
+            while True:
+                entry = await asyncio.to_thread(next, catalogs_iter, None)
+                if entry is None:
+                    break
+
+                await entries.put(entry)
+
+            for _ in range(max_catalogs):
+                await entries.put(None)
+
+        async def worker():
+            while True:
+                entry = await entries.get()
+                if entry is None:
+                    break
+
+                result = await self._fetch_catalog_async(
+                    vinted_client, entry, filter_by, only_vintage
+                )
+                await fetched.put(result)
+
+            await fetched.put(None)
+
+        tasks = [asyncio.create_task(feed())]
+        tasks += [asyncio.create_task(worker()) for _ in range(max_catalogs)]
+        num_done = 0
+
+        while num_done < max_catalogs:
+            result = await fetched.get()
+
+            if result is None:
+                num_done += 1
+                continue
+
+            entry, responses = result
+            await asyncio.to_thread(
+                self._process_catalog, entry, responses or [], loop, women
+            )
+
+            if responses is not None:
+                await asyncio.to_thread(self._complete, entry.get("id"))
+
+            loop.update(1)
+
+        await asyncio.gather(*tasks)
+        await asyncio.to_thread(self._finish)
+        loop.close()
+
+    def replay(
+        self,
+        archive: ResponseArchive,
+        women: bool,
+        decoder: Optional[Decoder] = None,
+    ):
+        decoder = decoder or Decoder()
+        self._reset_staging()
+        loop = tqdm()
+
+        records = archive.records(Endpoints.CATALOG_ITEMS, by_catalog=True)
+
+        for catalog_id, catalog_records in groupby(
+            records, key=lambda record: record.catalog_id
+        ):
+            responses = (
+                (record.params, self._replay_response(record, decoder))
+                for record in catalog_records
+            )
+
+            self._process_catalog(
+                {"id": catalog_id, "title": str(catalog_id)}, responses, loop, women
             )
-            filters = parse_filters(filters_response)
+            loop.update(1)
+
+        self._finish()
+        loop.close()
 
-            search_kwargs_list = self._process_catalog_filters(
-                catalog_id, filters, filter_by, only_vintage
+    def _replay_response(
+        self, record: ArchiveRecord, decoder: Decoder
+    ) -> VintedResponse:
+        if self.parse_pool is not None:
+            return VintedResponse(
+                status_code=record.status_code, content=record.content
             )
 
-            item_entries, image_entries, likes_entries, item_details_entries = (
-                [],
-                [],
-                [],
-                [],
+        try:
+            data = decoder.decode(record.content, record.endpoint)
+        except ValueError:
+            data = None
+
+        return VintedResponse(status_code=record.status_code, data=data)
+
+    async def _fetch_catalog_async(
+        self,
+        vinted_client: AsyncVinted,
+        entry: Dict,
+        filter_by: str,
+        only_vintage: bool,
+    ) -> Tuple[Dict, List[Tuple[Dict, VintedResponse]]]:
+        catalog_id = entry.get("id")
+
+        try:
+            search_kwargs_list = self.pending.get(catalog_id)
+
+            if search_kwargs_list is None:
+                filters = self._cached_filters(catalog_id)
+
+                if filters is None:
+                    filters_response = await vinted_client.catalog_filters(
+                        catalog_ids=[catalog_id]
+                    )
+                    filters = self._cache_filters(
+                        catalog_id, parse_filters(filters_response)
+                    )
+
+                search_kwargs_list = self._process_catalog_filters(
+                    catalog_id, filters, filter_by, only_vintage
+                )
+                self._save_pending(catalog_id, search_kwargs_list)
+
+            pages = await asyncio.gather(
+                *[
+                    self._collect_pages_async(vinted_client, search_kwargs)
+                    for search_kwargs in search_kwargs_list
+                ]
             )
 
-            for search_kwargs in search_kwargs_list:
-                material_id = search_kwargs.get("material_ids", [None])[0]
-                pattern_id = search_kwargs.get("patterns_ids", [None])[0]
-                color_id = search_kwargs.get("color_ids", [None])[0]
+            return entry, [pair for responses in pages for pair in responses]
 
-                response = self.vinted_client.search(**search_kwargs)
+        except Exception as e:
+            print(e)
+            return entry, None
 
-                results = self._process_search_response(
-                    response, catalog_id, material_id, pattern_id, color_id
+    async def _collect_pages_async(
+        self, vinted_client: AsyncVinted, search_kwargs: Dict
+    ) -> List[Tuple[Dict, VintedResponse]]:
+        if self.partitioner is None:
+            return [
+                (search_kwargs, response)
+                async for response in vinted_client.search_pages(
+                    **self._search_pages_kwargs(search_kwargs)
                 )
+            ]
+
+        slices = self.partitioner.slices(search_kwargs)
+        num_slices, num_splits = len(slices), 0
+        leaves = []
+
+        async def collect(slice_kwargs: Dict) -> List[Tuple[Dict, VintedResponse]]:
+            nonlocal num_slices, num_splits
+            pages = vinted_client.search_pages(**self._search_pages_kwargs(slice_kwargs))
+            responses = []
 
-                if not results:
+            async for response in pages:
+                responses.append((slice_kwargs, response))
+
+                if len(responses) > 1:
                     continue
 
-                (
-                    new_item_entries,
-                    new_image_entries,
-                    new_likes_entries,
-                    new_item_details_entries,
-                ) = results
-
-                item_entries.extend(new_item_entries)
-                image_entries.extend(new_image_entries)
-                likes_entries.extend(new_likes_entries)
-                item_details_entries.extend(new_item_details_entries)
-
-                self._update_progress(
-                    loop,
-                    women,
-                    catalog_title,
-                    color_id,
-                    material_id,
-                    pattern_id,
+                children = self._split_slice(
+                    slice_kwargs, response, num_slices, num_splits
                 )
+                if children:
+                    num_slices += len(children) - 1
+                    num_splits += 1
+                    await pages.aclose()
+
+                    nested = await asyncio.gather(*map(collect, children))
+                    return responses + [pair for pairs in nested for pair in pairs]
+
+            leaves.append(slice_kwargs)
+            return responses
+
+        pages = await asyncio.gather(*map(collect, slices))
+        self.partitioner.learn(search_kwargs, leaves)
+
+        return [pair for responses in pages for pair in responses]
+
+    def _search(self, search_kwargs: Dict) -> Iterator[Tuple[Dict, VintedResponse]]:
+        if self.partitioner is None:
+            for response in self.vinted_client.search_pages(
+                **self._search_pages_kwargs(search_kwargs)
+            ):
+                yield search_kwargs, response
+            return
 
-            if len(item_entries) > 0 and len(image_entries) > 0:
-                self.num_uploaded += self._upload(
-                    item_entries, image_entries, likes_entries, item_details_entries
+        slices = self.partitioner.slices(search_kwargs)
+        num_slices, num_splits = len(slices), 0
+        leaves = []
+
+        while slices:
+            slice_kwargs = slices.pop(0)
+            pages = self.vinted_client.search_pages(
+                **self._search_pages_kwargs(slice_kwargs)
+            )
+
+            for i, response in enumerate(pages):
+                yield slice_kwargs, response
+
+                children = (
+                    self._split_slice(slice_kwargs, response, num_slices, num_splits)
+                    if i == 0
+                    else None
                 )
+                if children:
+                    num_slices += len(children) - 1
+                    num_splits += 1
+                    slices[:0] = children
+                    pages.close()
+                    break
+            else:
+                leaves.append(slice_kwargs)
+
+        self.partitioner.learn(search_kwargs, leaves)
+
+    def _split_slice(
+        self,
+        slice_kwargs: Dict,
+        response: VintedResponse,
+        num_slices: int,
+        num_splits: int,
+    ) -> Optional[List[Dict]]:
+        if num_slices >= self.partitioner.max_slices:
+            return
+
+        # Planned searches split only while every slice, at full depth, and
+        # the first page of each split slice still fit their request share.
+        max_requests = slice_kwargs.get("max_requests")
+        depth = slice_kwargs.get("max_pages") or 1
+        if (
+            max_requests is not None
+            and (num_slices + 1) * depth + num_splits + 1 > max_requests
+        ):
+            return
 
-            if self.counter % self.insert_every_catalog == 0 or self.counter == len(
-                catalogs
+        # New items since the last run fit on this page, no need to go deeper.
+        since_id = self._since_id(slice_kwargs)
+        if since_id is not None and isinstance(response.data, dict):
+            if any(
+                int(item.get("id") or 0) <= since_id
+                for item in response.data.get("items") or []
             ):
-                self._insert_from_staging()
+                return
+
+        return self.partitioner.split(slice_kwargs, response.data)
+
+    def _load_filters(self, catalog_id: int) -> Dict:
+        filters = self._cached_filters(catalog_id)
+
+        if filters is None:
+            filters_response = self.vinted_client.catalog_filters(
+                catalog_ids=[catalog_id]
+            )
+            filters = self._cache_filters(catalog_id, parse_filters(filters_response))
+
+        return filters
+
+    def _cached_filters(self, catalog_id: int) -> Optional[Dict]:
+        if self.filter_cache is None:
+            return
+
+        return self.filter_cache.get(
+            self.filter_cache.make_key(catalog_id, catalog_ids=[catalog_id])
+        )
+
+    def _cache_filters(self, catalog_id: int, filters: Dict) -> Dict:
+        if self.filter_cache is not None and filters:
+            self.filter_cache.set(
+                self.filter_cache.make_key(catalog_id, catalog_ids=[catalog_id]),
+                filters,
+            )
+
+        return filters
+
+    def _known(self) -> DedupIndex:
+        return UnionIndex(self.visited, self.seen_store)
+
+    def _search_pages_kwargs(self, search_kwargs: Dict) -> Dict:
+        # Planned searches carry their own page depth.
+        search_kwargs = dict(search_kwargs)
+        max_pages = search_kwargs.pop("max_pages", self.max_pages)
+        search_kwargs.pop("max_requests", None)
+
+        return dict(
+            max_pages=max_pages,
+            seen=self._known(),
+            since_id=self._since_id(search_kwargs),
+            **search_kwargs,
+        )
+
+    def _since_id(self, search_kwargs: Dict) -> Optional[int]:
+        if self.watermarks is None:
+            return
+
+        if search_kwargs.get("order", "newest_first") != "newest_first":
+            return
+
+        return self.watermarks.get(Watermarks.make_key(search_kwargs))
+
+    def _track_searches(
+        self, catalog_id: int, responses: Iterable[Tuple[Dict, VintedResponse]]
+    ) -> Iterator[Tuple[Dict, VintedResponse]]:
+        # Marks and yields are only written once the catalog completes, an
+        # interrupted catalog is crawled again down to its previous marks.
+        # An existing mark also stays put unless its search's last page got
+        # back to it or ran out of results, else the ids between are skipped.
+        # A first mark skips nothing, items past the depth are never fetched.
+        marks = self.marks.setdefault(catalog_id, {})
+        yields = self.yields.setdefault(catalog_id, {})
+        since_ids = {}
+
+        for search_kwargs, response in responses:
+            key = Watermarks.make_key(search_kwargs)
+
+            if self.watermarks is not None:
+                if key not in since_ids:
+                    since_ids[key] = self._since_id(search_kwargs)
+
+                newest, _ = marks.get(key, (0, False))
+                ended = since_ids[key] is None or ends_search(
+                    response, search_kwargs.get("per_page", 96), since_ids[key]
+                )
+                marks[key] = (newest, ended)
+
+            if response.status_code == 200 and isinstance(response.data, dict):
+                if self.planner is not None:
+                    yields.setdefault(
+                        self._yield_key(search_kwargs), SearchYield()
+                    ).saturated |= is_saturated(response.data)
+
+                vinted_ids = [
+                    int(item.get("id"))
+                    for item in response.data.get("items") or []
+                    if item.get("id") is not None
+                ]
+
+                if self.watermarks is not None and vinted_ids:
+                    marks[key] = (max(newest, max(vinted_ids)), ended)
+
+            yield search_kwargs, response
+
+    def _observe_yield(
+        self, catalog_id: int, search_kwargs: Dict, batch: Optional[ItemBatch]
+    ):
+        self.yields.setdefault(catalog_id, {}).setdefault(
+            self._yield_key(search_kwargs), SearchYield()
+        ).observe(len(batch) if batch is not None else 0)
+
+    def _yield_key(self, search_kwargs: Dict) -> str:
+        # The planner only knows unsliced searches, price slices report to
+        # the search they were cut from. Watermarks stay per slice.
+        if self.partitioner is not None:
+            search_kwargs = unsliced(search_kwargs)
+
+        return search_key(search_kwargs)
+
+    def _process_catalog(
+        self,
+        entry: Dict,
+        responses: Iterable[Tuple[Dict, VintedResponse]],
+        loop: tqdm,
+        women: bool,
+    ):
+        self.counter += 1
+        catalog_title = entry.get("title")
+        catalog_id = entry.get("id")
+
+        batch = ItemBatch()
+
+        if self.watermarks is not None or self.planner is not None:
+            responses = self._track_searches(catalog_id, responses)
+
+        for search_kwargs, page_batch in self._parse_pages(catalog_id, responses):
+            if self.planner is not None:
+                self._observe_yield(catalog_id, search_kwargs, page_batch)
+
+            if page_batch is None:
+                continue
+
+            batch.extend(page_batch)
+
+            if self.stream_rows is not None and len(batch) >= self.stream_rows:
+                self._flush_batch(batch)
+                batch = ItemBatch()
+
+            material_id, pattern_id, color_id = self._filter_ids(search_kwargs)
+            self._update_progress(
+                loop,
+                women,
+                catalog_title,
+                color_id,
+                material_id,
+                pattern_id,
+            )
+
+        self._flush_batch(batch)
+
+        if self.counter % self.insert_every_catalog == 0:
+            self._promote()
+
+    def _parse_pages(
+        self, catalog_id: int, responses: Iterable[Tuple[Dict, VintedResponse]]
+    ) -> Iterator[Tuple[Dict, Optional[ItemBatch]]]:
+        if self.parse_pool is None:
+            for search_kwargs, response in responses:
+                yield search_kwargs, self._process_search_response(
+                    response, catalog_id, *self._filter_ids(search_kwargs)
+                )
+            return
+
+        # Keep a few pages in flight per worker so fetching overlaps parsing,
+        # pages still come back in the order they were fetched.
+        window = deque()
+
+        for search_kwargs, response in responses:
+            filter_ids = self._filter_ids(search_kwargs)
+
+            if response.status_code == 200 and response.content is not None:
+                page = self.parse_pool.submit(response.content, catalog_id, *filter_ids)
+            else:
+                page = self._process_search_response(response, catalog_id, *filter_ids)
+
+            window.append((search_kwargs, page))
+
+            while len(window) > 2 * self.parse_pool.num_workers:
+                yield self._resolve_page(*window.popleft())
+
+        while window:
+            yield self._resolve_page(*window.popleft())
+
+    def _resolve_page(
+        self, search_kwargs: Dict, page: Future | ItemBatch | None
+    ) -> Tuple[Dict, Optional[ItemBatch]]:
+        if not isinstance(page, Future):
+            return search_kwargs, page
+
+        batch, num_items, seconds = page.result()
+        self.metrics.observe("parse_seconds", seconds)
+
+        # Workers only see their own page, drop ids known from earlier ones.
+        known = self._known()
+        keep = [
+            i
+            for i, vinted_id in enumerate(batch.items["vinted_id"])
+            if vinted_id not in known
+        ]
+        num_duplicates = batch.num_duplicates + len(batch) - len(keep)
+
+        if len(keep) < len(batch):
+            batch = batch.take(keep)
+
+        batch.num_duplicates = num_duplicates
+        self._record_page(batch, num_items)
+
+        return search_kwargs, batch
+
+    @staticmethod
+    def _filter_ids(search_kwargs: Dict) -> Tuple[Optional[int], ...]:
+        return (
+            search_kwargs.get("material_ids", [None])[0],
+            search_kwargs.get("patterns_ids", [None])[0],
+            search_kwargs.get("color_ids", [None])[0],
+        )
+
+    def _flush_batch(self, batch: ItemBatch):
+        if len(batch) > 0:
+            num_uploaded = self._upload(batch)
+
+            if num_uploaded > 0:
+                self._on_uploaded(batch.items["vinted_id"])
+
+    def _finish(self):
+        if self.counter % self.insert_every_catalog != 0:
+            self._promote()
+
+        items_seen = self.metrics.total("items_seen")
+        self.metrics.set("catalogs", self.counter)
+        self.metrics.set("rows_promoted", self.num_inserted)
+        self.metrics.set(
+            "dedup_hit_rate",
+            self.metrics.total("items_duplicate") / items_seen if items_seen else 0.0,
+        )
+
+        if self.checkpoint is not None:
+            self._save_checkpoint()
+
+    def _start(self):
+        if self.resume and self._restore():
+            return
+
+        if self.checkpoint is not None:
+            self.checkpoint.clear()
+
+        self._reset_staging()
+
+    def _restore(self) -> bool:
+        if self.checkpoint is None:
+            return False
+
+        checkpoint = self.checkpoint.load()
+        if checkpoint is None:
+            return False
+
+        state, seen, self.pending = checkpoint
+
+        self.n = state["n"]
+        self.n_success = state["n_success"]
+        self.counter = state["counter"]
+        self.num_uploaded = state["num_uploaded"]
+        self.num_inserted = state["num_inserted"]
+        self.completed = set(state["completed"])
+
+        for vinted_id in seen:
+            self.visited.add(vinted_id)
+
+        # Pending catalogs are crawled again, rows they already staged must
+        # not be staged twice. They still await promotion to become seen.
+        for vinted_id in self.sink.staged_references(
+            ITEM_TABLE_ID, self._reference_field, self.staging_suffix
+        ):
+            self.visited.add(vinted_id)
+
+            if self.seen_store is not None:
+                self.staged.append(vinted_id)
+
+        print(
+            f"resumed: {len(self.completed)} catalogs | "
+            f"{len(self.pending)} pending | {len(self.visited)} seen"
+        )
+        return True
+
+    def _remaining(self, catalogs: Iterable[Dict]) -> Iterator[Dict]:
+        for entry in catalogs:
+            if entry.get("id") not in self.completed:
+                yield entry
+
+    def _save_pending(self, catalog_id: int, search_kwargs_list: List[Dict]):
+        with self._lock:
+            self.pending[catalog_id] = search_kwargs_list
+
+            if self.checkpoint is not None:
+                self.checkpoint.save_pending(self.pending)
+
+    def _complete(self, catalog_id: int):
+        with self._lock:
+            self.completed.add(catalog_id)
+            self.pending.pop(catalog_id, None)
+            marks = self.marks.pop(catalog_id, None)
+            yields = self.yields.pop(catalog_id, None)
+
+        if self.watermarks is not None and marks:
+            self.watermarks.update(
+                {
+                    key: newest
+                    for key, (newest, ended) in marks.items()
+                    if ended and newest > 0
+                }
+            )
+
+        if self.planner is not None and yields:
+            self.planner.record(catalog_id, yields)
+
+        if self.checkpoint is not None and self.counter % self.checkpoint_every == 0:
+            self._save_checkpoint()
+
+    def _save_checkpoint(self):
+        if self.writer is not None:
+            self.writer.flush()
+
+        with self._lock:
+            self.checkpoint.save(
+                {
+                    "n": self.n,
+                    "n_success": self.n_success,
+                    "counter": self.counter,
+                    "num_uploaded": self.num_uploaded,
+                    "num_inserted": self.num_inserted,
+                    "completed": sorted(self.completed),
+                },
+                self.visited,
+            )
+            self.checkpoint.save_pending(self.pending)
+
+    def _promote(self):
+        if self.writer is not None:
+            self.writer.flush()
+
+        if not self.promote_staging:
+            return
+
+        # Ids only become seen for good once their rows left staging, a
+        # reset or failed promotion would otherwise lose them.
+        with self._lock:
+            staged, self.staged = self.staged, []
+
+        with self.metrics.time("promotion_seconds"):
+            promoted = self._insert_from_staging()
+
+        if self.seen_store is None:
+            return
+
+        with self._lock:
+            if promoted:
+                self.seen_store.update(staged)
+                self.seen_store.flush()
+            else:
+                self.staged = staged + self.staged
+
+    @staticmethod
+    def _count_catalogs(catalogs: Iterable[Dict]) -> Optional[int]:
+        if isinstance(catalogs, Sized):
+            return len(catalogs)
+
+        return getattr(catalogs, "total", None)
+
+    def _on_uploaded(self, vinted_ids: List[str]):
+        with self._lock:
+            self.num_uploaded += len(vinted_ids)
+
+            if self.seen_store is not None:
+                self.staged.extend(vinted_ids)
+
+    def _on_written(self, table_id: str, rows: List[Row]):
+        if table_id == ITEM_TABLE_ID + self.staging_suffix:
+            self._on_uploaded([row.vinted_id for row in rows])
+
+    def _write_rows(self, table_id: str, rows: List[Row]) -> bool:
+        with self.metrics.time("upload_seconds", table=table_id):
+            success = self.sink.write(table_id, to_dicts(rows))
+
+        self._record_write(table_id, len(rows), success)
+        return success
+
+    def _write_columns(self, table_id: str, columns: Columns) -> bool:
+        with self.metrics.time("upload_seconds", table=table_id):
+            success = self.sink.write_columns(table_id, columns)
+
+        self._record_write(table_id, len(columns), success)
+        return success
+
+    def _record_write(self, table_id: str, num_rows: int, success: bool):
+        self.metrics.inc(
+            "rows_written" if success else "rows_failed", num_rows, table=table_id
+        )
+
+    def close(self):
+        if self.parse_pool is not None:
+            self.parse_pool.close()
+
+        if self.writer is not None:
+            self.writer.close()
+
+        if self.seen_store is not None:
+            self.seen_store.close()
+
+        if self.filter_cache is not None:
+            self.filter_cache.close()
+
+        if self.watermarks is not None:
+            self.watermarks.close()
+
+        if self.planner is not None:
+            self.planner.close()
+
+        if self.partitioner is not None:
+            self.partitioner.close()
+
+        self.sink.close()
 
     def _update_progress(
         self,
@@ -133,72 +845,50 @@ class VintedScraper:
             f"Success rate: {success_rate:.2f} | "
             f"Uploaded: {self.num_uploaded} | "
             f"Inserted: {self.num_inserted} | "
+            f"Seen: {len(self.visited)} ({self.visited.nbytes / 2**20:.1f} MB) | "
         )
 
-    def _upload(
-        self,
-        item_entries: List[Dict],
-        image_entries: List[Dict],
-        likes_entries: List[Dict],
-        item_details_entries: List[Dict],
-    ) -> int:
+    def _upload(self, batch: ItemBatch) -> int:
         num_uploaded = 0
 
-        random.shuffle(item_entries)
+        batch.items = batch.items.take(random.sample(range(len(batch)), len(batch)))
 
-        all_rows = [
-            item_entries,
-            image_entries,
-            likes_entries,
-            item_details_entries,
+        staging_table_ids = [
+            ITEM_TABLE_ID + self.staging_suffix,
+            IMAGE_TABLE_ID + self.staging_suffix,
         ]
+        all_table_ids = staging_table_ids + [LIKES_TABLE_ID, ITEM_DETAILS_TABLE_ID]
 
-        all_table_ids = [
-            STAGING_ITEM_TABLE_ID,
-            STAGING_IMAGE_TABLE_ID,
-            LIKES_TABLE_ID,
-            ITEM_DETAILS_TABLE_ID,
-        ]
+        if self.writer is not None:
+            for table_id, columns in zip(all_table_ids, batch.tables()):
+                self.writer.put(table_id, columns.to_records())
 
-        for table_id, rows in zip(all_table_ids, all_rows):
-            if len(rows) > 0:
-                success = upload(
-                    client=self.bq_client,
-                    dataset_id=DATASET_ID,
-                    table_id=table_id,
-                    rows=rows,
-                )
+            return 0
+
+        for table_id, columns in zip(all_table_ids, batch.tables()):
+            if len(columns) > 0:
+                success = self._write_columns(table_id, columns)
 
-                if (
-                    table_id in [STAGING_ITEM_TABLE_ID, STAGING_IMAGE_TABLE_ID]
-                    and not success
-                ):
+                if table_id in staging_table_ids and not success:
                     return 0
 
-                if table_id == STAGING_ITEM_TABLE_ID:
-                    num_uploaded += len(rows)
+                if table_id == staging_table_ids[0]:
+                    num_uploaded += len(columns)
 
         return num_uploaded
 
-    def _insert_from_staging(self):
-        for table_id in [ITEM_TABLE_ID, IMAGE_TABLE_ID]:
-            inserted = insert_staging_rows(
-                client=self.bq_client,
-                dataset_id=DATASET_ID,
-                table_id=table_id,
-                reference_field=self._reference_field,
-            )
+    def _insert_from_staging(self) -> bool:
+        num_inserted = self.sink.merge_from_staging(
+            [ITEM_TABLE_ID, IMAGE_TABLE_ID], self._reference_field, self.staging_suffix
+        )
+        self.num_inserted += max(num_inserted, 0)
 
-            self.num_inserted += max(inserted, 0)
+        return num_inserted >= 0
 
     def _reset_staging(self):
-        for table_id in [ITEM_TABLE_ID, IMAGE_TABLE_ID]:
-            reset_staging_table(
-                client=self.bq_client,
-                dataset_id=DATASET_ID,
-                table_id=table_id,
-                field_id=self._reference_field,
-            )
+        self.sink.reset_staging(
+            [ITEM_TABLE_ID, IMAGE_TABLE_ID], self._reference_field, self.staging_suffix
+        )
 
     def _process_catalog_filters(
         self,
@@ -212,6 +902,19 @@ class VintedScraper:
         if catalog_id in DESIGNER_CATALOG_IDS:
             filter_by_updated.append("brand")
 
+        if self.planner is not None and not only_vintage:
+            return self.planner.plan(
+                catalog_id,
+                filters,
+                filter_by_updated,
+                self.max_pages,
+                num_slices=(
+                    (lambda search_kwargs: len(self.partitioner.slices(search_kwargs)))
+                    if self.partitioner is not None
+                    else None
+                ),
+            )
+
         search_kwargs_list = []
 
         for filter_key in filter_by_updated:
@@ -233,39 +936,37 @@ class VintedScraper:
         material_id: Optional[int] = None,
         pattern_id: Optional[int] = None,
         color_id: Optional[int] = None,
-    ) -> Tuple[List[Dict], List[Dict], List[Dict], List[Dict]] | None:
-        item_entries, image_entries, likes_entries, item_details_entries = (
-            [],
-            [],
-            [],
-            [],
-        )
-
+    ) -> ItemBatch | None:
         if response.status_code == 403:
-            random_sleep()
+            if self._rate_limiter is None:
+                random_sleep()
             return
 
         elif response.status_code == 200 and isinstance(response.data, dict):
             items = response.data.get("items", [])
 
-            for item in items:
-                self.n += 1
-
-                result = parse_item(
-                    item, catalog_id, self.visited, material_id, pattern_id, color_id
+            with self.metrics.time("parse_seconds"):
+                batch = parse_items(
+                    items,
+                    catalog_id,
+                    self.visited,
+                    material_id,
+                    pattern_id,
+                    color_id,
+                    self.seen_store,
                 )
 
-                if not result:
-                    continue
+            self._record_page(batch, len(items))
+            return batch
 
-                item_entry, image_entry, likes_entry, item_details_entry = result
+        return ItemBatch()
 
-                item_entries.append(item_entry)
-                image_entries.append(image_entry)
-                likes_entries.append(likes_entry)
-                item_details_entries.append(item_details_entry)
+    def _record_page(self, batch: ItemBatch, num_items: int):
+        self.metrics.inc("items_seen", num_items)
+        self.metrics.inc("items_duplicate", batch.num_duplicates)
 
-                self.visited.append(item_entry.get("vinted_id"))
-                self.n_success += 1
+        for vinted_id in batch.items["vinted_id"]:
+            self.visited.add(vinted_id)
 
-        return item_entries, image_entries, likes_entries, item_details_entries
+        self.n += num_items
+        self.n_success += len(batch)
@@ -0,0 +1,159 @@
+from typing import Iterable, Iterator, Set, Tuple
+
+import os, math, mmap, struct, heapq, hashlib
+from array import array
+from bisect import bisect_left
+
+from .dedup import DedupIndex
+
+_BLOOM_MAGIC = b"VTDBLOOM"
+_BLOOM_HEADER = struct.Struct("<8sQQ")
+_ID_SIZE = array("q").itemsize
+
+
+class BloomFilter:
+    def __init__(
+        self, path: str, capacity: int = 10_000_000, error_rate: float = 0.001
+    ):
+        self.path = path
+
+        if not os.path.exists(path):
+            num_bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+            num_hashes = max(1, round(num_bits / capacity * math.log(2)))
+            self._create(num_bits, num_hashes)
+
+        self._file = open(path, "r+b")
+        self._mmap = mmap.mmap(self._file.fileno(), 0)
+
+        magic, self.num_bits, self.num_hashes = _BLOOM_HEADER.unpack_from(self._mmap)
+        if magic != _BLOOM_MAGIC:
+            raise ValueError(f"{path} is not a bloom filter file")
+
+    def _create(self, num_bits: int, num_hashes: int) -> None:
+        with open(self.path, "wb") as file:
+            file.write(_BLOOM_HEADER.pack(_BLOOM_MAGIC, num_bits, num_hashes))
+            file.truncate(_BLOOM_HEADER.size + (num_bits + 7) // 8)
+
+    def _positions(self, key: int) -> Iterator[int]:
+        digest = hashlib.blake2b(key.to_bytes(8, "little"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, key: int) -> None:
+        for position in self._positions(key):
+            offset = _BLOOM_HEADER.size + (position >> 3)
+            self._mmap[offset] |= 1 << (position & 7)
+
+    def __contains__(self, key: int) -> bool:
+        for position in self._positions(key):
+            offset = _BLOOM_HEADER.size + (position >> 3)
+            if not self._mmap[offset] & (1 << (position & 7)):
+                return False
+
+        return True
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._mmap)
+
+    def flush(self) -> None:
+        self._mmap.flush()
+
+    def close(self) -> None:
+        self._mmap.close()
+        self._file.close()
+
+
+class SeenStore(DedupIndex):
+    def __init__(
+        self, directory: str, capacity: int = 10_000_000, error_rate: float = 0.001
+    ):
+        os.makedirs(directory, exist_ok=True)
+
+        self.ids_path = os.path.join(directory, "ids.bin")
+        self.bloom = BloomFilter(
+            os.path.join(directory, "bloom.bin"), capacity, error_rate
+        )
+
+        self._pending: Set[int] = set()
+        self._ids_file, self._ids_mmap, self._ids = self._load_ids()
+
+    def _load_ids(self) -> Tuple:
+        if not os.path.exists(self.ids_path) or os.path.getsize(self.ids_path) == 0:
+            return None, None, []
+
+        ids_file = open(self.ids_path, "rb")
+        ids_mmap = mmap.mmap(ids_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        return ids_file, ids_mmap, memoryview(ids_mmap).cast("q")
+
+    def _close_ids(self) -> None:
+        if self._ids_mmap is not None:
+            self._ids.release()
+            self._ids_mmap.close()
+            self._ids_file.close()
+
+        self._ids_file, self._ids_mmap, self._ids = None, None, []
+
+    def add(self, key: int | str) -> None:
+        key = int(key)
+
+        if key not in self:
+            self.bloom.add(key)
+            self._pending.add(key)
+
+    def update(self, keys: Iterable[int | str]) -> None:
+        for key in keys:
+            self.add(key)
+
+    def __contains__(self, key: int | str) -> bool:
+        key = int(key)
+
+        if key not in self.bloom:
+            return False
+
+        if key in self._pending:
+            return True
+
+        ids = self._ids
+        index = bisect_left(ids, key)
+        return index < len(ids) and ids[index] == key
+
+    def __len__(self) -> int:
+        return len(self._ids) + len(self._pending)
+
+    def __iter__(self) -> Iterator[int]:
+        return heapq.merge(iter(self._ids), sorted(self._pending))
+
+    @property
+    def nbytes(self) -> int:
+        return self.bloom.nbytes + len(self._ids) * _ID_SIZE + len(self._pending) * 32
+
+    def flush(self) -> None:
+        self.bloom.flush()
+
+        if not self._pending:
+            return
+
+        tmp_path = self.ids_path + ".tmp"
+        merged = array("q", heapq.merge(iter(self._ids), sorted(self._pending)))
+
+        with open(tmp_path, "wb") as file:
+            merged.tofile(file)
+
+        os.replace(tmp_path, self.ids_path)
+
+        # Lookups from the event loop thread don't hold the scraper lock. Swap
+        # in the new mapping before clearing pending ids and leave the old one
+        # to be freed once no lookup holds it, releasing it here could pull
+        # the view from under a running bisect.
+        self._ids_file, self._ids_mmap, self._ids = self._load_ids()
+        self._pending.clear()
+
+    def close(self) -> None:
+        self.flush()
+        self._close_ids()
+        self.bloom.close()
@@ -0,0 +1,454 @@
+from typing import List, Dict, Set, Iterator, Iterable, Literal, Optional
+
+import os, json, glob, sqlite3, threading
+from itertools import islice
+from google.cloud import bigquery
+
+from .bigquery import (
+    insert_staging_rows,
+    load_table,
+    merge_staging_rows,
+    reset_staging_table,
+    write_rows,
+)
+from .batch import Columns
+from .rows import row_type
+from .enums import DATASET_ID, STAGING_SUFFIX, UploadMode
+
+
+class Sink:
+    def write(self, table_id: str, rows: List[Dict]) -> bool:
+        raise NotImplementedError
+
+    def write_columns(self, table_id: str, columns: Columns) -> bool:
+        return self.write(table_id, columns.to_rows())
+
+    def merge_from_staging(
+        self,
+        table_ids: List[str],
+        reference_field: str,
+        staging_suffix: str = STAGING_SUFFIX,
+    ) -> int:
+        raise NotImplementedError
+
+    def reset_staging(
+        self,
+        table_ids: List[str],
+        reference_field: str,
+        staging_suffix: str = STAGING_SUFFIX,
+    ) -> bool:
+        raise NotImplementedError
+
+    def staged_references(
+        self,
+        table_id: str,
+        reference_field: str,
+        staging_suffix: str = STAGING_SUFFIX,
+    ) -> Iterable:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class BigQuerySink(Sink):
+    def __init__(
+        self,
+        client: bigquery.Client,
+        dataset_id: str = DATASET_ID,
+        upload_mode: UploadMode = "stream",
+        promotion: Literal["insert", "merge"] = "insert",
+    ):
+        self.client = client
+        self.dataset_id = dataset_id
+        self.upload_mode = upload_mode
+        self.promotion = promotion
+        self.watermarks: Dict[str, Dict[str, str]] = {}
+
+    def write(self, table_id: str, rows: List[Dict]) -> bool:
+        return write_rows(
+            client=self.client,
+            dataset_id=self.dataset_id,
+            table_id=table_id,
+            rows=rows,
+            mode=self.upload_mode,
+        )
+
+    def merge_from_staging(
+        self,
+        table_ids: List[str],
+        reference_field: str,
+        staging_suffix: str = STAGING_SUFFIX,
+    ) -> int:
+        if self.promotion == "merge":
+            num_inserted, self.watermarks[staging_suffix] = merge_staging_rows(
+                client=self.client,
+                dataset_id=self.dataset_id,
+                table_ids=table_ids,
+                reference_field=reference_field,
+                watermarks=self.watermarks.get(staging_suffix),
+                staging_suffix=staging_suffix,
+            )
+            return num_inserted
+
+        # -1 when any table failed to promote, like merge_staging_rows.
+        inserted = [
+            insert_staging_rows(
+                client=self.client,
+                dataset_id=self.dataset_id,
+                table_id=table_id,
+                reference_field=reference_field,
+                staging_suffix=staging_suffix,
+            )
+            for table_id in table_ids
+        ]
+
+        return -1 if min(inserted) < 0 else sum(inserted)
+
+    def reset_staging(
+        self,
+        table_ids: List[str],
+        reference_field: str,
+        staging_suffix: str = STAGING_SUFFIX,
+    ) -> bool:
+        self.watermarks.pop(staging_suffix, None)
+
+        return all(
+            [
+                reset_staging_table(
+                    client=self.client,
+                    dataset_id=self.dataset_id,
+                    table_id=table_id,
+                    field_id=reference_field,
+                    staging_suffix=staging_suffix,
+                )
+                for table_id in table_ids
+            ]
+        )
+
+    def staged_references(
+        self,
+        table_id: str,
+        reference_field: str,
+        staging_suffix: str = STAGING_SUFFIX,
+    ) -> Iterable:
+        rows = load_table(
+            client=self.client,
+            table_id=f"{table_id}{staging_suffix}",
+            dataset_id=self.dataset_id,
+            fields=[reference_field],
+            to_list=False,
+        )
+
+        return (row[reference_field] for row in rows)
+
+
+class LocalSink(Sink):
+    def __init__(self, directory: Optional[str]):
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+        self.directory = directory
+        self._references: Dict[str, Set] = {}
+        self._merged: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def write(self, table_id: str, rows: List[Dict]) -> bool:
+        if not rows:
+            return True
+
+        with self._lock:
+            self._write(table_id, rows)
+
+        return True
+
+    def merge_from_staging(
+        self,
+        table_ids: List[str],
+        reference_field: str,
+        staging_suffix: str = STAGING_SUFFIX,
+    ) -> int:
+        num_inserted = 0
+
+        with self._lock:
+            for table_id in table_ids:
+                staging_id = f"{table_id}{staging_suffix}"
+                references = self._load_references(table_id, reference_field)
+                staging_rows = islice(
+                    self._read(staging_id), self._merged.get(staging_id, 0), None
+                )
+                new_rows = []
+
+                for row in staging_rows:
+                    self._merged[staging_id] = self._merged.get(staging_id, 0) + 1
+
+                    if row.get(reference_field) not in references:
+                        references.add(row.get(reference_field))
+                        new_rows.append(row)
+
+                if new_rows:
+                    self._write(table_id, new_rows)
+
+                num_inserted += len(new_rows)
+
+        return num_inserted
+
+    def reset_staging(
+        self,
+        table_ids: List[str],
+        reference_field: str,
+        staging_suffix: str = STAGING_SUFFIX,
+    ) -> bool:
+        with self._lock:
+            for table_id in table_ids:
+                staging_id = f"{table_id}{staging_suffix}"
+                self._truncate(staging_id)
+                self._merged[staging_id] = 0
+
+        return True
+
+    def staged_references(
+        self,
+        table_id: str,
+        reference_field: str,
+        staging_suffix: str = STAGING_SUFFIX,
+    ) -> Iterable:
+        with self._lock:
+            return [
+                row.get(reference_field)
+                for row in self._read(f"{table_id}{staging_suffix}")
+            ]
+
+    def _load_references(self, table_id: str, reference_field: str) -> Set:
+        if table_id not in self._references:
+            self._references[table_id] = {
+                row.get(reference_field) for row in self._read(table_id)
+            }
+
+        return self._references[table_id]
+
+    def _write(self, table_id: str, rows: List[Dict]) -> None:
+        raise NotImplementedError
+
+    def _read(self, table_id: str) -> Iterator[Dict]:
+        raise NotImplementedError
+
+    def _truncate(self, table_id: str) -> None:
+        raise NotImplementedError
+
+
+class MemorySink(LocalSink):
+    def __init__(self):
+        super().__init__(directory=None)
+        self.tables: Dict[str, List[Dict]] = {}
+
+    def _write(self, table_id: str, rows: List[Dict]) -> None:
+        self.tables.setdefault(table_id, []).extend(rows)
+
+    def _read(self, table_id: str) -> Iterator[Dict]:
+        return iter(self.tables.get(table_id, []))
+
+    def _truncate(self, table_id: str) -> None:
+        self.tables[table_id] = []
+
+
+class JsonlSink(LocalSink):
+    def _path(self, table_id: str) -> str:
+        return os.path.join(self.directory, f"{table_id}.jsonl")
+
+    def _write(self, table_id: str, rows: List[Dict]) -> None:
+        with open(self._path(table_id), "a", encoding="utf-8") as file:
+            for row in rows:
+                file.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+    def _read(self, table_id: str) -> Iterator[Dict]:
+        if not os.path.exists(self._path(table_id)):
+            return
+
+        with open(self._path(table_id), "r", encoding="utf-8") as file:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+
+    def _truncate(self, table_id: str) -> None:
+        open(self._path(table_id), "w").close()
+
+
+class ParquetSink(LocalSink):
+    def __init__(self, directory: str):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("pyarrow is required for ParquetSink")
+
+        super().__init__(directory)
+        self._pa, self._pq = pa, pq
+
+    def _parts(self, table_id: str) -> List[str]:
+        return sorted(glob.glob(os.path.join(self.directory, table_id, "*.parquet")))
+
+    def write_columns(self, table_id: str, columns: Columns) -> bool:
+        if not len(columns):
+            return True
+
+        with self._lock:
+            self._write_table(table_id, self._pa.Table.from_batches([columns.to_arrow()]))
+
+        return True
+
+    def _write(self, table_id: str, rows: List[Dict]) -> None:
+        self._write_table(
+            table_id, self._pa.Table.from_pylist(rows, schema=self._schema(table_id))
+        )
+
+    @staticmethod
+    def _schema(table_id: str):
+        # Part files of a table must share a schema to be read back together.
+        table_row_type = row_type(table_id)
+        return table_row_type.arrow_schema() if table_row_type is not None else None
+
+    def _write_table(self, table_id: str, table) -> None:
+        table_dir = os.path.join(self.directory, table_id)
+        os.makedirs(table_dir, exist_ok=True)
+
+        path = os.path.join(table_dir, f"part-{len(self._parts(table_id)):06d}.parquet")
+        self._pq.write_table(table, path)
+
+    def _read(self, table_id: str) -> Iterator[Dict]:
+        for path in self._parts(table_id):
+            yield from self._pq.read_table(path).to_pylist()
+
+    def _truncate(self, table_id: str) -> None:
+        for path in self._parts(table_id):
+            os.remove(path)
+
+
+class SQLiteSink(Sink):
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._columns: Dict[str, List[str]] = {}
+        self._lock = threading.Lock()
+
+    def write(self, table_id: str, rows: List[Dict]) -> bool:
+        if not rows:
+            return True
+
+        columns = list(rows[0].keys())
+        values = [[row.get(column) for column in columns] for row in rows]
+
+        return self._insert(table_id, columns, values)
+
+    def write_columns(self, table_id: str, columns: Columns) -> bool:
+        if not len(columns):
+            return True
+
+        return self._insert(table_id, columns.names, columns.values())
+
+    def _insert(self, table_id: str, columns: List[str], values: Iterable) -> bool:
+        with self._lock:
+            columns = self._ensure_table(table_id, columns)
+            placeholders = ", ".join("?" for _ in columns)
+
+            self._conn.executemany(
+                f"INSERT INTO {table_id} ({', '.join(columns)}) VALUES ({placeholders})",
+                values,
+            )
+            self._conn.commit()
+
+        return True
+
+    def merge_from_staging(
+        self,
+        table_ids: List[str],
+        reference_field: str,
+        staging_suffix: str = STAGING_SUFFIX,
+    ) -> int:
+        num_inserted = 0
+
+        with self._lock:
+            for table_id in table_ids:
+                staging_columns = self._table_columns(f"{table_id}{staging_suffix}")
+                if not staging_columns:
+                    continue
+
+                columns = ", ".join(self._ensure_table(table_id, staging_columns))
+                cursor = self._conn.execute(f"""
+                    INSERT INTO {table_id} ({columns})
+                    SELECT {columns} FROM {table_id}{staging_suffix}
+                    WHERE rowid IN (
+                        SELECT MIN(rowid) FROM {table_id}{staging_suffix}
+                        WHERE {reference_field} NOT IN (
+                            SELECT {reference_field} FROM {table_id}
+                        )
+                        GROUP BY {reference_field}
+                    )
+                    """)
+                num_inserted += cursor.rowcount
+
+            self._conn.commit()
+
+        return num_inserted
+
+    def reset_staging(
+        self,
+        table_ids: List[str],
+        reference_field: str,
+        staging_suffix: str = STAGING_SUFFIX,
+    ) -> bool:
+        with self._lock:
+            for table_id in table_ids:
+                if self._table_columns(f"{table_id}{staging_suffix}"):
+                    self._conn.execute(f"DELETE FROM {table_id}{staging_suffix}")
+
+            self._conn.commit()
+
+        return True
+
+    def staged_references(
+        self,
+        table_id: str,
+        reference_field: str,
+        staging_suffix: str = STAGING_SUFFIX,
+    ) -> Iterable:
+        with self._lock:
+            if not self._table_columns(f"{table_id}{staging_suffix}"):
+                return []
+
+            return [
+                row[0]
+                for row in self._conn.execute(
+                    f"SELECT {reference_field} FROM {table_id}{staging_suffix}"
+                )
+            ]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _table_columns(self, table_id: str) -> List[str]:
+        if table_id not in self._columns:
+            info = self._conn.execute(f"PRAGMA table_info({table_id})").fetchall()
+            if not info:
+                return []
+
+            self._columns[table_id] = [column[1] for column in info]
+
+        return self._columns[table_id]
+
+    def _ensure_table(self, table_id: str, columns: Iterator[str]) -> List[str]:
+        existing = self._table_columns(table_id)
+        columns = list(columns)
+
+        if not existing:
+            self._conn.execute(f"CREATE TABLE {table_id} ({', '.join(columns)})")
+            self._columns[table_id] = list(columns)
+            return columns
+
+        for column in columns:
+            if column not in existing:
+                self._conn.execute(f"ALTER TABLE {table_id} ADD COLUMN {column}")
+                existing.append(column)
+
+        return columns
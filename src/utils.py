@@ -5,6 +5,8 @@ from copy import deepcopy
 from datetime import datetime
 from .enums import N_ITEMS_MAX, VINTAGE_BRAND_ID
 
+SEARCH_PAGING_PARAMS = ("page", "per_page", "order", "max_pages", "max_requests")
+
 
 def random_sleep(min_sleep: int = 1, max_sleep: int = 10) -> None:
     sleep_time = random.randint(min_sleep, max_sleep)
@@ -21,6 +23,18 @@ def create_batches(input_list: List, batch_size: int) -> List[List]:
     return batches
 
 
+def search_key(search_kwargs: Dict) -> str:
+    """Identifies a search by the items it can return, paging aside."""
+    return json.dumps(
+        {
+            key: value
+            for key, value in search_kwargs.items()
+            if key not in SEARCH_PAGING_PARAMS and value is not None
+        },
+        sort_keys=True,
+    )
+
+
 def prepare_search_kwargs(
     catalog_id: int,
     filters: Dict,
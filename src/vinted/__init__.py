@@ -1,2 +1,6 @@
 from .client import Vinted
+from .async_client import AsyncVinted
 from .models import VintedResponse
+from .ratelimit import RateLimiter
+from .decode import Decoder
+from .archive import ResponseArchive
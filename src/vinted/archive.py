@@ -0,0 +1,201 @@
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import os, glob, json, time, zlib, struct, threading
+
+from .endpoints import Endpoints
+
+ARCHIVED_ENDPOINTS = (Endpoints.CATALOG_ITEMS, Endpoints.CATALOG_FILTERS)
+
+# endpoint, segment, offset, length, status code, fetched at
+_INDEX_ENTRY = struct.Struct("<BIQIHd")
+_ENDPOINTS = list(Endpoints)
+
+
+class ArchiveRecord(NamedTuple):
+    endpoint: Endpoints
+    params: Dict
+    status_code: int
+    fetched_at: float
+    content: bytes
+
+    @property
+    def catalog_id(self) -> Optional[int]:
+        return _catalog_id(self.params)
+
+
+def _catalog_id(params: Dict) -> Optional[int]:
+    catalog_ids = params.get("catalog_ids")
+
+    if isinstance(catalog_ids, list):
+        return catalog_ids[0] if catalog_ids else None
+
+    return catalog_ids
+
+
+class ResponseArchive:
+    """Append-only store of raw response payloads.
+
+    Each record is zlib-compressed on its own into the current segment file
+    and located through a fixed-width entry in index.bin, written after the
+    record so the index never points past the data.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        segment_size: int = 256 * 2**20,
+        compression_level: int = 6,
+    ):
+        os.makedirs(directory, exist_ok=True)
+
+        self.directory = directory
+        self.segment_size = segment_size
+        self.compression_level = compression_level
+        self.index_path = os.path.join(directory, "index.bin")
+
+        segments = self._segments()
+        self._segment_id = len(segments) - 1 if segments else 0
+        self._segment = None
+        self._index = None
+        self._lock = threading.Lock()
+
+    def _segments(self) -> List[str]:
+        return sorted(glob.glob(os.path.join(self.directory, "segment-*.z")))
+
+    def _segment_path(self, segment_id: int) -> str:
+        return os.path.join(self.directory, f"segment-{segment_id:06d}.z")
+
+    def append(
+        self,
+        endpoint: Endpoints,
+        params: Optional[Dict],
+        status_code: int,
+        content: bytes,
+    ) -> None:
+        fetched_at = time.time()
+        header = json.dumps(
+            {key: value for key, value in (params or {}).items() if value is not None}
+        ).encode()
+        record = zlib.compress(header + b"\n" + content, self.compression_level)
+
+        with self._lock:
+            if self._segment is None:
+                self._segment = open(self._segment_path(self._segment_id), "ab")
+                self._index = open(self.index_path, "ab")
+
+            if self._segment.tell() + len(record) > self.segment_size > 0:
+                self._segment.close()
+                self._segment_id += 1
+                self._segment = open(self._segment_path(self._segment_id), "ab")
+
+            offset = self._segment.tell()
+            self._segment.write(record)
+            self._segment.flush()
+
+            self._index.write(
+                _INDEX_ENTRY.pack(
+                    _ENDPOINTS.index(endpoint),
+                    self._segment_id,
+                    offset,
+                    len(record),
+                    status_code,
+                    fetched_at,
+                )
+            )
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._index is not None:
+                self._segment.flush()
+                self._index.flush()
+
+    def __len__(self) -> int:
+        self.flush()
+
+        if not os.path.exists(self.index_path):
+            return 0
+
+        return os.path.getsize(self.index_path) // _INDEX_ENTRY.size
+
+    def records(
+        self, endpoint: Optional[Endpoints] = None, by_catalog: bool = False
+    ) -> Iterator[ArchiveRecord]:
+        """Records in the order they were archived, or with each catalog's
+        records together in order of first appearance when by_catalog is set.
+        Concurrent crawls interleave catalogs in the archive.
+        """
+        self.flush()
+
+        if not os.path.exists(self.index_path):
+            return
+
+        segments = {}
+
+        try:
+            entries = self._entries(endpoint)
+
+            if by_catalog:
+                buckets: Dict[Optional[int], List[Tuple]] = {}
+
+                for entry in entries:
+                    header = self._read(segments, entry, header_only=True)
+                    buckets.setdefault(_catalog_id(json.loads(header)), []).append(
+                        entry
+                    )
+
+                entries = (entry for bucket in buckets.values() for entry in bucket)
+
+            for entry in entries:
+                endpoint_code, _, _, _, status_code, fetched_at = entry
+                header, content = self._read(segments, entry).split(b"\n", 1)
+
+                yield ArchiveRecord(
+                    endpoint=_ENDPOINTS[endpoint_code],
+                    params=json.loads(header),
+                    status_code=status_code,
+                    fetched_at=fetched_at,
+                    content=content,
+                )
+        finally:
+            for segment in segments.values():
+                segment.close()
+
+    def _entries(self, endpoint: Optional[Endpoints]) -> Iterator[Tuple]:
+        with open(self.index_path, "rb") as index:
+            while True:
+                entry = index.read(_INDEX_ENTRY.size)
+                if len(entry) < _INDEX_ENTRY.size:
+                    return
+
+                entry = _INDEX_ENTRY.unpack(entry)
+
+                if endpoint is None or _ENDPOINTS[entry[0]] == endpoint:
+                    yield entry
+
+    def _read(self, segments: Dict, entry: Tuple, header_only: bool = False) -> bytes:
+        _, segment_id, offset, length, _, _ = entry
+
+        if segment_id not in segments:
+            segments[segment_id] = open(self._segment_path(segment_id), "rb")
+
+        segment = segments[segment_id]
+        segment.seek(offset)
+
+        if not header_only:
+            return zlib.decompress(segment.read(length))
+
+        # Inflate just far enough to reach the end of the header line.
+        decompressor = zlib.decompressobj()
+        data = decompressor.decompress(segment.read(length), 4096)
+
+        while b"\n" not in data and decompressor.unconsumed_tail:
+            data += decompressor.decompress(decompressor.unconsumed_tail, 4096)
+
+        return data.split(b"\n", 1)[0]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._segment is not None:
+                self._segment.close()
+                self._index.close()
+                self._segment = self._index = None
@@ -0,0 +1,240 @@
+from typing import List, Literal, Dict, Optional, Container, AsyncIterator, TYPE_CHECKING
+
+import asyncio
+import time
+from itertools import count
+import aiohttp
+
+from .endpoints import Endpoints
+from .utils import (
+    build_search_params,
+    build_catalog_filters_params,
+    encode_params,
+    is_last_page,
+)
+from .models import VintedResponse
+from .ratelimit import RateLimiter
+from .decode import Decoder
+from .archive import ResponseArchive, ARCHIVED_ENDPOINTS
+
+if TYPE_CHECKING:
+    from ..metrics import Metrics
+from .enums import Domain, SortOption, USER_AGENT
+
+
+class AsyncVinted:
+    def __init__(
+        self,
+        domain: Domain = "fr",
+        max_concurrency: int = 16,
+        max_per_host: int = 8,
+        max_retries: int = 3,
+        backoff_factor: float = 0.5,
+        rate_limiter: Optional[RateLimiter] = None,
+        decoder: Optional[Decoder] = None,
+        metrics: Optional["Metrics"] = None,
+        base_url: Optional[str] = None,
+        archive: Optional[ResponseArchive] = None,
+    ) -> None:
+        self.base_url = base_url or f"https://www.vinted.{domain}"
+        self.api_url = f"{self.base_url}/api/v2"
+        self.headers = {"User-Agent": USER_AGENT}
+        self.max_concurrency = max_concurrency
+        self.max_per_host = max_per_host
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.rate_limiter = rate_limiter
+        self.decoder = decoder or Decoder()
+        self.metrics = metrics
+        self.archive = archive
+
+        self.session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def __aenter__(self) -> "AsyncVinted":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def start(self) -> None:
+        connector = aiohttp.TCPConnector(
+            limit=self.max_concurrency, limit_per_host=self.max_per_host
+        )
+        self.session = aiohttp.ClientSession(connector=connector, headers=self.headers)
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        await self.fetch_cookies()
+
+    async def close(self) -> None:
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def fetch_cookies(self):
+        async with self.session.get(self.base_url) as response:
+            await response.read()
+            return response.cookies
+
+    async def _call(
+        self,
+        method: Literal["get"],
+        url: str,
+        params: Dict = None,
+        endpoint: Optional[Endpoints] = None,
+    ) -> VintedResponse:
+        encoded_params = encode_params(params or {})
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self._semaphore:
+                    started = time.perf_counter()
+
+                    async with self.session.request(
+                        method=method, url=url, params=encoded_params
+                    ) as response:
+                        content = await response.read()
+                        self._record(endpoint, response.status, started, content)
+
+                        if response.status != 200:
+                            return VintedResponse(status_code=response.status)
+
+                        if self.archive is not None and endpoint in ARCHIVED_ENDPOINTS:
+                            self.archive.append(endpoint, params, response.status, content)
+
+                        try:
+                            data = self.decoder.decode(content, endpoint)
+                        except ValueError:
+                            data = None
+
+                        return VintedResponse(
+                            status_code=response.status,
+                            data=data,
+                            content=content if self.decoder.summary else None,
+                        )
+
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if attempt == self.max_retries:
+                    raise
+
+                await asyncio.sleep(self.backoff_factor * 2**attempt)
+
+    def _record(
+        self,
+        endpoint: Optional[Endpoints],
+        status_code: int,
+        started: float,
+        content: bytes,
+    ) -> None:
+        if self.metrics is not None and endpoint is not None:
+            self.metrics.record_request(
+                endpoint.name, status_code, time.perf_counter() - started, len(content)
+            )
+
+    async def _get(
+        self,
+        endpoint: Endpoints,
+        format_values=None,
+        params: Dict = None,
+    ) -> VintedResponse:
+        if format_values:
+            url = self.api_url + endpoint.value.format(format_values)
+        else:
+            url = self.api_url + endpoint.value
+
+        for attempt in count():
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire_async(endpoint.name)
+
+            response = await self._call(
+                method="get", url=url, params=params, endpoint=endpoint
+            )
+
+            if self.rate_limiter is None or not self.rate_limiter.should_retry(
+                endpoint.name, response.status_code, attempt
+            ):
+                return response
+
+    async def search(
+        self,
+        url: str = None,
+        page: int = 1,
+        per_page: int = 96,
+        query: str = None,
+        price_from: float = None,
+        price_to: float = None,
+        order: SortOption = "newest_first",
+        catalog_ids: int | List[int] = None,
+        size_ids: int | List[int] = None,
+        brand_ids: int | List[int] = None,
+        status_ids: int | List[int] = None,
+        color_ids: int | List[int] = None,
+        patterns_ids: int | List[int] = None,
+        material_ids: int | List[int] = None,
+    ) -> VintedResponse:
+        params = build_search_params(
+            url=url,
+            page=page,
+            per_page=per_page,
+            query=query,
+            price_from=price_from,
+            price_to=price_to,
+            order=order,
+            catalog_ids=catalog_ids,
+            size_ids=size_ids,
+            brand_ids=brand_ids,
+            status_ids=status_ids,
+            color_ids=color_ids,
+            patterns_ids=patterns_ids,
+            material_ids=material_ids,
+        )
+
+        return await self._get(Endpoints.CATALOG_ITEMS, params=params)
+
+    async def search_pages(
+        self,
+        max_pages: Optional[int] = None,
+        seen: Optional[Container] = None,
+        since_id: Optional[int] = None,
+        page: int = 1,
+        **search_kwargs,
+    ) -> AsyncIterator[VintedResponse]:
+        pages = count(page) if max_pages is None else range(page, page + max_pages)
+
+        for page in pages:
+            response = await self.search(page=page, **search_kwargs)
+            last_page = is_last_page(
+                response, page, search_kwargs.get("per_page", 96), seen, since_id
+            )
+
+            yield response
+
+            if last_page:
+                return
+
+    async def item_info(self, item_id: int) -> VintedResponse:
+        return await self._get(Endpoints.ITEMS, item_id)
+
+    async def catalog_filters(
+        self,
+        query: str = None,
+        catalog_ids: int = None,
+        brand_ids: int | List[int] = None,
+        status_ids: int | List[int] = None,
+        color_ids: int | List[int] = None,
+    ) -> VintedResponse:
+        params = build_catalog_filters_params(
+            query=query,
+            catalog_ids=catalog_ids,
+            brand_ids=brand_ids,
+            status_ids=status_ids,
+            color_ids=color_ids,
+        )
+        return await self._get(Endpoints.CATALOG_FILTERS, params=params)
+
+    async def catalogs_list(self) -> VintedResponse:
+        return await self._get(
+            Endpoints.CATALOG_INITIALIZERS,
+            params={"page": 1, "time": time.time()},
+        )
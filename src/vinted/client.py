@@ -1,29 +1,78 @@
-from typing import List, Literal, Dict
+from typing import List, Literal, Dict, Container, Iterator, Optional, TYPE_CHECKING
 
 import requests
 import time
+from itertools import count
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from .endpoints import Endpoints
-from .utils import parse_url_to_params
+from .utils import build_search_params, build_catalog_filters_params, is_last_page
 from .models import VintedResponse
+from .ratelimit import RateLimiter
+from .decode import Decoder
+from .archive import ResponseArchive, ARCHIVED_ENDPOINTS
+
+if TYPE_CHECKING:
+    from ..metrics import Metrics
 from .enums import Domain, SortOption, USER_AGENT
 
 
 class Vinted:
-    def __init__(self, domain: Domain = "fr") -> None:
-        self.base_url = f"https://www.vinted.{domain}"
+    def __init__(
+        self,
+        domain: Domain = "fr",
+        pool_size: int = 10,
+        max_retries: int = 3,
+        backoff_factor: float = 0.5,
+        rate_limiter: Optional[RateLimiter] = None,
+        decoder: Optional[Decoder] = None,
+        metrics: Optional["Metrics"] = None,
+        base_url: Optional[str] = None,
+        archive: Optional[ResponseArchive] = None,
+    ) -> None:
+        self.base_url = base_url or f"https://www.vinted.{domain}"
         self.api_url = f"{self.base_url}/api/v2"
         self.headers = {"User-Agent": USER_AGENT}
+        self.rate_limiter = rate_limiter
+        self.decoder = decoder or Decoder()
+        self.metrics = metrics
+        self.archive = archive
+        self.session = self._init_session(pool_size, max_retries, backoff_factor)
         self.cookies = self.fetch_cookies()
 
+    def _init_session(
+        self, pool_size: int, max_retries: int, backoff_factor: float
+    ) -> requests.Session:
+        retries = Retry(
+            total=max_retries,
+            connect=max_retries,
+            read=max_retries,
+            status=0,
+            backoff_factor=backoff_factor,
+            allowed_methods=["GET"],
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retries
+        )
+
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update(self.headers)
+
+        return session
+
     def fetch_cookies(self):
-        response = requests.get(self.base_url, headers=self.headers)
+        response = self.session.get(self.base_url)
         return response.cookies
 
+    def close(self) -> None:
+        self.session.close()
+
     def _call(self, method: Literal["get"], *args, **kwargs):
-        return requests.request(
-            method=method, headers=self.headers, cookies=self.cookies, *args, **kwargs
-        )
+        return self.session.request(method=method, *args, **kwargs)
 
     def _get(
         self,
@@ -37,14 +86,39 @@ class Vinted:
         else:
             url = self.api_url + endpoint.value
 
-        response = self._call(method="get", url=url, *args, **kwargs)
+        for attempt in count():
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire(endpoint.name)
+
+            started = time.perf_counter()
+            response = self._call(method="get", url=url, *args, **kwargs)
+
+            if self.metrics is not None:
+                self.metrics.record_request(
+                    endpoint.name,
+                    response.status_code,
+                    time.perf_counter() - started,
+                    len(response.content),
+                )
+
+            if self.rate_limiter is None or not self.rate_limiter.should_retry(
+                endpoint.name, response.status_code, attempt
+            ):
+                break
 
         if response.status_code == 200:
+            if self.archive is not None and endpoint in ARCHIVED_ENDPOINTS:
+                self.archive.append(
+                    endpoint, kwargs.get("params"), response.status_code, response.content
+                )
+
             try:
                 return VintedResponse(
-                    status_code=response.status_code, data=response.json()
+                    status_code=response.status_code,
+                    data=self.decoder.decode(response.content, endpoint),
+                    content=response.content if self.decoder.summary else None,
                 )
-            except requests.exceptions.JSONDecodeError:
+            except ValueError:
                 return VintedResponse(status_code=response.status_code)
         else:
             return VintedResponse(status_code=response.status_code)
@@ -66,27 +140,46 @@ class Vinted:
         patterns_ids: int | List[int] = None,
         material_ids: int | List[int] = None,
     ) -> VintedResponse:
-        params = {
-            "page": page,
-            "per_page": per_page,
-            "time": time.time(),
-            "search_text": query,
-            "price_from": price_from,
-            "price_to": price_to,
-            "catalog_ids": catalog_ids,
-            "order": order,
-            "size_ids": size_ids,
-            "brand_ids": brand_ids,
-            "status_ids": status_ids,
-            "color_ids": color_ids,
-            "patterns_ids": patterns_ids,
-            "material_ids": material_ids,
-        }
-        if url:
-            params.update(parse_url_to_params(url))
+        params = build_search_params(
+            url=url,
+            page=page,
+            per_page=per_page,
+            query=query,
+            price_from=price_from,
+            price_to=price_to,
+            order=order,
+            catalog_ids=catalog_ids,
+            size_ids=size_ids,
+            brand_ids=brand_ids,
+            status_ids=status_ids,
+            color_ids=color_ids,
+            patterns_ids=patterns_ids,
+            material_ids=material_ids,
+        )
 
         return self._get(Endpoints.CATALOG_ITEMS, params=params)
 
+    def search_pages(
+        self,
+        max_pages: Optional[int] = None,
+        seen: Optional[Container] = None,
+        since_id: Optional[int] = None,
+        page: int = 1,
+        **search_kwargs,
+    ) -> Iterator[VintedResponse]:
+        pages = count(page) if max_pages is None else range(page, page + max_pages)
+
+        for page in pages:
+            response = self.search(page=page, **search_kwargs)
+            last_page = is_last_page(
+                response, page, search_kwargs.get("per_page", 96), seen, since_id
+            )
+
+            yield response
+
+            if last_page:
+                return
+
     def search_users(
         self, query: str, page: int = 1, per_page: int = 36
     ) -> VintedResponse:
@@ -144,14 +237,13 @@ class Vinted:
         status_ids: int | List[int] = None,
         color_ids: int | List[int] = None,
     ) -> VintedResponse:
-        params = {
-            "search_text": query,
-            "catalog_ids": catalog_ids,
-            "time": time.time(),
-            "brand_ids": brand_ids,
-            "status_ids": status_ids,
-            "color_ids": color_ids,
-        }
+        params = build_catalog_filters_params(
+            query=query,
+            catalog_ids=catalog_ids,
+            brand_ids=brand_ids,
+            status_ids=status_ids,
+            color_ids=color_ids,
+        )
         return self._get(Endpoints.CATALOG_FILTERS, params=params)
 
     def catalogs_list(self) -> VintedResponse:
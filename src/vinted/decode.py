@@ -0,0 +1,122 @@
+from typing import Any, Callable, List, Literal, Optional, Union
+
+import json
+
+from .endpoints import Endpoints
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+
+JSONBackend = Literal["auto", "orjson", "msgspec", "json"]
+JSON_BACKENDS = ["auto", "orjson", "msgspec", "json"]
+
+
+if msgspec is not None:
+
+    class _Struct(msgspec.Struct):
+        def get(self, key: str, default: Any = None) -> Any:
+            return getattr(self, key, default)
+
+    class Photo(_Struct):
+        url: Optional[str] = None
+
+    class Price(_Struct):
+        amount: Union[str, float, None] = None
+        currency_code: Optional[str] = None
+
+    class Pagination(_Struct):
+        current_page: Optional[int] = None
+        total_pages: Optional[int] = None
+        total_entries: Optional[int] = None
+
+    class Item(_Struct):
+        id: Optional[int] = None
+        title: Optional[str] = None
+        url: Optional[str] = None
+        photo: Optional[Photo] = None
+        price: Optional[Price] = None
+        brand_title: Optional[str] = None
+        size_title: Optional[str] = None
+        status: Optional[str] = None
+        favourite_count: Optional[int] = None
+
+    class SearchPage(msgspec.Struct):
+        items: List[Item] = []
+        pagination: Optional[Pagination] = None
+
+    class ItemId(_Struct):
+        id: Optional[int] = None
+        price: Optional[Price] = None
+
+    class SearchSummary(msgspec.Struct):
+        items: List[ItemId] = []
+        pagination: Optional[Pagination] = None
+
+
+class Decoder:
+    def __init__(
+        self, backend: JSONBackend = "auto", typed: bool = False, summary: bool = False
+    ):
+        """With summary=True search pages decode to item ids and pagination only,
+        the client then keeps the raw payload on the response for parse workers.
+        """
+        if backend == "auto":
+            backend = "orjson" if orjson else "msgspec" if msgspec else "json"
+
+        if backend == "orjson" and orjson is None:
+            raise ImportError("orjson is required for the orjson backend")
+
+        if backend == "msgspec" and msgspec is None:
+            raise ImportError("msgspec is required for the msgspec backend")
+
+        if typed and msgspec is None:
+            raise ImportError("msgspec is required for typed decoding")
+
+        if summary and msgspec is None:
+            raise ImportError("msgspec is required for summary decoding")
+
+        self.backend = backend
+        self.typed = typed
+        self.summary = summary
+
+        self._decode = self._init_decode(backend)
+        # Lax decoders coerce numbers sent as strings and the like.
+        self._search_decoder = (
+            msgspec.json.Decoder(SearchPage, strict=False) if typed else None
+        )
+        self._summary_decoder = (
+            msgspec.json.Decoder(SearchSummary, strict=False) if summary else None
+        )
+
+    @staticmethod
+    def _init_decode(backend: JSONBackend) -> Callable[[bytes], Any]:
+        if backend == "orjson":
+            return orjson.loads
+
+        if backend == "msgspec":
+            return msgspec.json.Decoder().decode
+
+        return json.loads
+
+    def decode(self, content: bytes, endpoint: Optional[Endpoints] = None) -> Any:
+        if endpoint == Endpoints.CATALOG_ITEMS:
+            page_decoder = self._summary_decoder or self._search_decoder
+
+            if page_decoder is not None:
+                try:
+                    page = page_decoder.decode(content)
+                    return {"items": page.items, "pagination": page.pagination}
+                except msgspec.ValidationError as e:
+                    # One odd item shouldn't cost the page, the untyped items
+                    # are checked one by one when parsed.
+                    print(f"typed decoding failed, decoding untyped: {e}")
+
+        return self._decode(content)
@@ -6,3 +6,4 @@ from dataclasses import dataclass
 class VintedResponse:
     status_code: int
     data: Optional[Dict] = None
+    content: Optional[bytes] = None
@@ -0,0 +1,134 @@
+from typing import Dict
+from collections import Counter
+
+import time, asyncio, threading
+
+THROTTLE_STATUS_CODES = (403, 429)
+
+
+class TokenBucket:
+    def __init__(
+        self,
+        rate: float,
+        burst: int = 4,
+        min_rate: float = 0.1,
+        max_rate: float = 20.0,
+        increase: float = 0.05,
+        decrease: float = 0.5,
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.last_decrease = 0.0
+
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self) -> float:
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens -= 1
+
+            return max(0.0, -self.tokens / self.rate)
+
+    def acquire(self) -> None:
+        time.sleep(self.reserve())
+
+    async def acquire_async(self) -> None:
+        await asyncio.sleep(self.reserve())
+
+    def on_success(self) -> None:
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_throttle(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+
+            if now - self.last_decrease < 1.0 / self.rate:
+                return
+
+            self._refill(now)
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            self.tokens = min(self.tokens, 0.0)
+            self.last_decrease = now
+
+
+class RateLimiter:
+    def __init__(
+        self,
+        rate: float = 2.0,
+        burst: int = 4,
+        min_rate: float = 0.1,
+        max_rate: float = 20.0,
+        increase: float = 0.05,
+        decrease: float = 0.5,
+        max_retries: int = 3,
+    ):
+        self.bucket_kwargs = {
+            "rate": rate,
+            "burst": burst,
+            "min_rate": min_rate,
+            "max_rate": max_rate,
+            "increase": increase,
+            "decrease": decrease,
+        }
+        self.max_retries = max_retries
+
+        self.buckets: Dict[str, TokenBucket] = {}
+        self.requests = Counter()
+        self.throttled = Counter()
+        self.retries = Counter()
+
+        self._lock = threading.Lock()
+
+    def bucket(self, endpoint: str) -> TokenBucket:
+        with self._lock:
+            if endpoint not in self.buckets:
+                self.buckets[endpoint] = TokenBucket(**self.bucket_kwargs)
+
+            return self.buckets[endpoint]
+
+    def acquire(self, endpoint: str) -> None:
+        self.bucket(endpoint).acquire()
+        self.requests[endpoint] += 1
+
+    async def acquire_async(self, endpoint: str) -> None:
+        await self.bucket(endpoint).acquire_async()
+        self.requests[endpoint] += 1
+
+    def should_retry(self, endpoint: str, status_code: int, attempt: int) -> bool:
+        if status_code not in THROTTLE_STATUS_CODES:
+            if status_code == 200:
+                self.bucket(endpoint).on_success()
+
+            return False
+
+        self.throttled[endpoint] += 1
+        self.bucket(endpoint).on_throttle()
+
+        if attempt >= self.max_retries:
+            return False
+
+        self.retries[endpoint] += 1
+        return True
+
+    def stats(self) -> Dict[str, Dict]:
+        return {
+            endpoint: {
+                "rate": round(bucket.rate, 3),
+                "requests": self.requests[endpoint],
+                "throttled": self.throttled[endpoint],
+                "retries": self.retries[endpoint],
+            }
+            for endpoint, bucket in self.buckets.items()
+        }
@@ -1,6 +1,9 @@
-import re
+from typing import Dict, List, Tuple, Container, Optional
+
+import re, time
 
 from .exceptions import InvalidUrlException
+from .models import VintedResponse
 from urllib.parse import unquote
 
 
@@ -52,3 +55,129 @@ def parse_url_to_params(url: str):
     except Exception as e:
         print(e)
         raise InvalidUrlException
+
+
+def build_search_params(
+    url: str = None,
+    page: int = 1,
+    per_page: int = 96,
+    query: str = None,
+    price_from: float = None,
+    price_to: float = None,
+    order: str = "newest_first",
+    catalog_ids: int | List[int] = None,
+    size_ids: int | List[int] = None,
+    brand_ids: int | List[int] = None,
+    status_ids: int | List[int] = None,
+    color_ids: int | List[int] = None,
+    patterns_ids: int | List[int] = None,
+    material_ids: int | List[int] = None,
+) -> Dict:
+    params = {
+        "page": page,
+        "per_page": per_page,
+        "time": time.time(),
+        "search_text": query,
+        "price_from": price_from,
+        "price_to": price_to,
+        "catalog_ids": catalog_ids,
+        "order": order,
+        "size_ids": size_ids,
+        "brand_ids": brand_ids,
+        "status_ids": status_ids,
+        "color_ids": color_ids,
+        "patterns_ids": patterns_ids,
+        "material_ids": material_ids,
+    }
+    if url:
+        params.update(parse_url_to_params(url))
+
+    return params
+
+
+def build_catalog_filters_params(
+    query: str = None,
+    catalog_ids: int = None,
+    brand_ids: int | List[int] = None,
+    status_ids: int | List[int] = None,
+    color_ids: int | List[int] = None,
+) -> Dict:
+    return {
+        "search_text": query,
+        "catalog_ids": catalog_ids,
+        "time": time.time(),
+        "brand_ids": brand_ids,
+        "status_ids": status_ids,
+        "color_ids": color_ids,
+    }
+
+
+def encode_params(params: Dict) -> List[Tuple[str, str]]:
+    encoded = []
+
+    for key, value in params.items():
+        if value is None:
+            continue
+
+        if isinstance(value, (list, tuple)):
+            encoded.extend((key, str(v)) for v in value)
+        else:
+            encoded.append((key, str(value)))
+
+    return encoded
+
+
+def is_last_page(
+    response: VintedResponse,
+    page: int,
+    per_page: int,
+    seen: Optional[Container] = None,
+    since_id: Optional[int] = None,
+) -> bool:
+    if response.status_code != 200 or not isinstance(response.data, dict):
+        return True
+
+    items = response.data.get("items", [])
+    if len(items) < per_page:
+        return True
+
+    total_pages = (response.data.get("pagination") or {}).get("total_pages")
+    if total_pages is not None and page >= total_pages:
+        return True
+
+    if reaches_since_id(items, since_id):
+        return True
+
+    if seen is not None:
+        return all(item.get("id") in seen for item in items)
+
+    return False
+
+
+def reaches_since_id(items: List, since_id: Optional[int]) -> bool:
+    # since_id is the newest id of an earlier newest_first crawl.
+    return since_id is not None and any(
+        int(item.get("id") or 0) <= since_id for item in items
+    )
+
+
+def ends_search(
+    response: VintedResponse, per_page: int, since_id: Optional[int] = None
+) -> bool:
+    # Paging may stop here without skipping items newer than since_id.
+    if response.status_code != 200 or not isinstance(response.data, dict):
+        return False
+
+    items = response.data.get("items") or []
+    if len(items) < per_page or reaches_since_id(items, since_id):
+        return True
+
+    pagination = response.data.get("pagination") or {}
+    current_page = pagination.get("current_page")
+    total_pages = pagination.get("total_pages")
+
+    return (
+        current_page is not None
+        and total_pages is not None
+        and current_page >= total_pages
+    )
@@ -0,0 +1,62 @@
+from typing import Dict, Optional
+
+import time, sqlite3, threading
+
+from .utils import search_key
+
+
+class Watermarks:
+    """Highest vinted id seen per search, newest_first paging stops below it."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS watermarks (
+                key TEXT PRIMARY KEY,
+                vinted_id INTEGER NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """)
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(search_kwargs: Dict) -> str:
+        return search_key(search_kwargs)
+
+    def get(self, key: str) -> Optional[int]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT vinted_id FROM watermarks WHERE key = ?", (key,)
+            ).fetchone()
+
+        return row[0] if row is not None else None
+
+    def update(self, marks: Dict[str, int]) -> None:
+        """Raises the mark of each key, a mark never moves backwards."""
+        if not marks:
+            return
+
+        now = time.time()
+
+        with self._lock:
+            self._conn.executemany(
+                """
+                INSERT INTO watermarks VALUES (?, ?, ?)
+                ON CONFLICT (key) DO UPDATE SET
+                    vinted_id = MAX(vinted_id, excluded.vinted_id),
+                    updated_at = excluded.updated_at
+                """,
+                [(key, vinted_id, now) for key, vinted_id in marks.items()],
+            )
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM watermarks").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,145 @@
+from typing import Callable, Dict, List, Optional
+from collections import Counter, defaultdict
+
+import time, queue, threading
+from concurrent.futures import ThreadPoolExecutor
+
+_STOP = object()
+
+
+class BackgroundWriter:
+    def __init__(
+        self,
+        write: Callable[[str, List[Dict]], bool],
+        on_written: Optional[Callable[[str, List[Dict]], None]] = None,
+        batch_size: int = 1000,
+        flush_interval: float = 5.0,
+        max_queue: int = 64,
+        num_workers: int = 4,
+    ):
+        self.write = write
+        self.on_written = on_written
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self.written = Counter()
+        self.failed = Counter()
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._buffers: Dict[str, List[Dict]] = defaultdict(list)
+        self._buffered_at: Dict[str, float] = {}
+
+        self._executor = ThreadPoolExecutor(max_workers=num_workers)
+        self._in_flight = threading.BoundedSemaphore(2 * num_workers)
+        self._futures = set()
+        self._lock = threading.Lock()
+
+        self._dispatcher = threading.Thread(target=self._run, daemon=True)
+        self._dispatcher.start()
+
+    def put(self, table_id: str, rows: List[Dict]) -> None:
+        if rows:
+            self._queue.put((table_id, rows))
+
+    def flush(self) -> None:
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait()
+
+    def close(self) -> None:
+        self._queue.put(_STOP)
+        self._dispatcher.join()
+        self._executor.shutdown(wait=True)
+
+    def _run(self) -> None:
+        while True:
+            try:
+                message = self._queue.get(timeout=self._next_timeout())
+            except queue.Empty:
+                self._flush_expired()
+                continue
+
+            if message is _STOP:
+                self._flush_all()
+                return
+
+            if isinstance(message, threading.Event):
+                self._flush_all()
+                message.set()
+                continue
+
+            table_id, rows = message
+            buffer = self._buffers[table_id]
+            buffer.extend(rows)
+            self._buffered_at.setdefault(table_id, time.monotonic())
+
+            while len(buffer) >= self.batch_size:
+                self._submit(table_id, buffer[: self.batch_size])
+                del buffer[: self.batch_size]
+
+            if not buffer:
+                self._buffered_at.pop(table_id, None)
+
+            self._flush_expired()
+
+    def _next_timeout(self) -> float:
+        if not self._buffered_at:
+            return self.flush_interval
+
+        oldest = min(self._buffered_at.values())
+        return max(0.0, oldest + self.flush_interval - time.monotonic())
+
+    def _flush_expired(self) -> None:
+        now = time.monotonic()
+
+        for table_id, buffered_at in list(self._buffered_at.items()):
+            if now - buffered_at >= self.flush_interval:
+                self._flush_table(table_id)
+
+    def _flush_all(self) -> None:
+        for table_id in list(self._buffered_at):
+            self._flush_table(table_id)
+
+        with self._lock:
+            futures = list(self._futures)
+
+        for future in futures:
+            future.result()
+
+    def _flush_table(self, table_id: str) -> None:
+        rows = self._buffers.pop(table_id, [])
+        self._buffered_at.pop(table_id, None)
+
+        if rows:
+            self._submit(table_id, rows)
+
+    def _submit(self, table_id: str, rows: List[Dict]) -> None:
+        self._in_flight.acquire()
+        future = self._executor.submit(self._write, table_id, rows)
+
+        with self._lock:
+            self._futures.add(future)
+
+        future.add_done_callback(self._on_done)
+
+    def _on_done(self, future) -> None:
+        with self._lock:
+            self._futures.discard(future)
+
+        self._in_flight.release()
+
+    def _write(self, table_id: str, rows: List[Dict]) -> None:
+        try:
+            success = self.write(table_id, rows)
+        except Exception as e:
+            print(e)
+            success = False
+
+        with self._lock:
+            if success:
+                self.written[table_id] += len(rows)
+            else:
+                self.failed[table_id] += len(rows)
+
+        if success and self.on_written is not None:
+            self.on_written(table_id, rows)